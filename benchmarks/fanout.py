@@ -0,0 +1,65 @@
+"""
+Пропускная способность NotificationDispatcher против фейкового Bot API.
+
+    python -m benchmarks.fanout --messages 2000 --chats 500 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import random
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from src.notifications.dispatcher import Notification, NotificationDispatcher
+from src.notifications.rate_limit import RateLimiter
+
+
+class FakeBot:
+    """Имитирует send_message с задержкой сети и редкими retry_after."""
+
+    def __init__(self, latency: float, retry_after_ratio: float) -> None:
+        self.latency = latency
+        self.retry_after_ratio = retry_after_ratio
+        self.calls = 0
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if random.random() < self.retry_after_ratio:
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=chat_id, text=text),
+                message="Flood control exceeded",
+                retry_after=1,
+            )
+
+
+async def run(args: argparse.Namespace) -> None:
+    bot = FakeBot(latency=args.latency, retry_after_ratio=args.retry_after)
+    dispatcher = NotificationDispatcher(
+        bot,
+        limiter=RateLimiter(global_rate=args.global_rate, per_chat_rate=args.chat_rate),
+        workers=args.workers,
+        record=False,
+    )
+    notifications = [
+        Notification(chat_id=i % args.chats, text=f"message {i}") for i in range(args.messages)
+    ]
+    stats = await dispatcher.send_many(notifications)
+    print(stats, f"api_calls={bot.calls}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--retry-after", type=float, default=0.0)
+    parser.add_argument("--global-rate", type=float, default=25)
+    parser.add_argument("--chat-rate", type=float, default=1)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
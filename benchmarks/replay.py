@@ -0,0 +1,295 @@
+"""
+Пропускная способность и задержки хендлеров: апдейты подаются прямо в `dp.feed_update`
+диспетчера из `src.app`, Bot API заменён фейковой сессией, БД — локальная (DB_URL).
+
+    python -m benchmarks.replay --users 200 --concurrency 50
+    python -m benchmarks.replay --updates updates.jsonl
+
+Синтетический сценарий на каждого пользователя: полный диалог создания задачи
+(включая inline-поиск исполнителя) и оба списка задач. Записанные апдейты — JSON Update
+по одному на строку; порядок внутри чата сохраняется, чаты обрабатываются параллельно.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterable
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from typing import Any
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import Message, TelegramObject, Update
+from sqlalchemy import delete, or_, select
+
+from src.api.db.database import engine, session_scope
+from src.api.db.models import OutboxMessage, Task, User
+from src.app import create_dispatcher, prepare_database
+from src.objects.users import UserService
+
+# Синтетические пользователи заводятся в отдельном диапазоне telegram_id
+TELEGRAM_ID_BASE = 9_000_000_000
+USERNAME_PREFIX = "bench_"
+UNHANDLED = "<unhandled>"
+
+
+class FakeSession(BaseSession):
+    """Сессия Bot API без сети: запоминает вызовы и возвращает правдоподобные ответы."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__()
+        self.latency = latency
+        self.calls: defaultdict[str, int] = defaultdict(int)
+        self._message_ids = count(1)
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[TelegramType], timeout: int | None = None
+    ) -> TelegramType:
+        self.calls[type(method).__name__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method.__returning__ is not Message:
+            return True
+        return Message.model_validate(
+            {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": getattr(method, "chat_id", 0), "type": "private"},
+                "text": getattr(method, "text", None),
+            },
+            context={"bot": bot},
+        )
+
+    async def stream_content(
+        self,
+        *args: Any,
+        **kwargs: Any,
+    ) -> AsyncGenerator[bytes]:
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+def create_fake_bot() -> Bot:
+    """Bot без сети — фабрика для воркеров шардированного запуска (benchmarks.sharded)."""
+    return Bot(token="42:BENCHMARK", session=FakeSession())
+
+
+class HandlerProbe(BaseMiddleware):
+    """Внутренний middleware: сообщает, какой хендлер выбран для апдейта."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        probe = data.get("bench_probe")
+        if probe is not None:
+            probe["handler"] = data["handler"].callback.__name__
+        return await handler(event, data)
+
+
+class Updates:
+    """Фабрика JSON-апдейтов одного пользователя в личном чате с ботом."""
+
+    _update_ids = count(1)
+
+    def __init__(self, telegram_id: int) -> None:
+        self.user = {
+            "id": telegram_id,
+            "is_bot": False,
+            "first_name": "Bench",
+            "last_name": str(telegram_id),
+            "username": f"{USERNAME_PREFIX}{telegram_id}",
+        }
+        self.chat = {"id": telegram_id, "type": "private"}
+        self._ids = count(1)
+
+    def _update(self, **payload: object) -> dict[str, Any]:
+        return {"update_id": next(self._update_ids), **payload}
+
+    def _message(self, text: str) -> dict[str, Any]:
+        return {
+            "message_id": next(self._ids),
+            "date": int(datetime.now(timezone.utc).timestamp()),
+            "chat": self.chat,
+            "from": self.user,
+            "text": text,
+        }
+
+    def message(self, text: str) -> dict[str, Any]:
+        return self._update(message=self._message(text))
+
+    def callback(self, data: str) -> dict[str, Any]:
+        return self._update(
+            callback_query={
+                "id": str(next(self._ids)),
+                "from": self.user,
+                "chat_instance": str(self.chat["id"]),
+                "data": data,
+                "message": self._message("…"),
+            }
+        )
+
+    def inline_query(self, query: str) -> dict[str, Any]:
+        return self._update(
+            inline_query={
+                "id": str(next(self._ids)),
+                "from": self.user,
+                "query": query,
+                "offset": "",
+            }
+        )
+
+
+def task_flow(telegram_id: int, assignee_id: int) -> list[dict[str, Any]]:
+    """Создание задачи от /task_create до сохранения, затем оба списка задач."""
+    updates = Updates(telegram_id)
+    return [
+        updates.message("/task_create"),
+        updates.message(f"Задача {telegram_id}"),
+        updates.callback("task_deadline_none"),
+        updates.callback("task_assign_manual"),
+        updates.inline_query(USERNAME_PREFIX),
+        updates.message(f"👤 {assignee_id}"),
+        updates.callback("task_assign_done"),
+        updates.callback("task_confirm_save"),
+        updates.message("📄 Мои задачи"),
+        updates.message("🔎 Все задачи"),
+    ]
+
+
+def recorded_flows(path: str) -> list[list[dict[str, Any]]]:
+    """Записанные апдейты, сгруппированные по чату/пользователю с сохранением порядка."""
+    flows: dict[int, list[dict[str, Any]]] = defaultdict(list)
+    with Path(path).open(encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            update = json.loads(line)
+            event = next(value for key, value in update.items() if key != "update_id")
+            key = (event.get("chat") or event.get("message", {}).get("chat") or event["from"])["id"]
+            flows[key].append(update)
+    return list(flows.values())
+
+
+async def seed_assignee() -> int:
+    """Исполнитель для синтетических задач."""
+    async with session_scope() as session:
+        user = await UserService.resolve_telegram_user(
+            session, TELEGRAM_ID_BASE, f"{USERNAME_PREFIX}assignee", "Bench Assignee"
+        )
+    return user.id
+
+
+async def cleanup() -> None:
+    """Удалить синтетических пользователей, их задачи и уведомления."""
+    async with session_scope() as session:
+        bench_users = select(User.id).where(User.telegram_id >= TELEGRAM_ID_BASE)
+        await session.execute(delete(OutboxMessage).where(OutboxMessage.user_id.in_(bench_users)))
+        await session.execute(
+            delete(Task).where(
+                or_(Task.created_by.in_(bench_users), Task.assigned_to.in_(bench_users))
+            )
+        )
+        await session.execute(delete(User).where(User.telegram_id >= TELEGRAM_ID_BASE))
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def report(latencies: dict[str, list[float]], elapsed: float, calls: dict[str, int]) -> None:
+    total = sum(len(values) for values in latencies.values())
+    lines = [f"{'handler':<28}{'count':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for name, values in sorted(latencies.items()):
+        lines.append(
+            f"{name:<28}{len(values):>8}{len(values) / elapsed:>10.1f}"
+            f"{percentile(values, 0.50) * 1000:>10.2f}"
+            f"{percentile(values, 0.95) * 1000:>10.2f}"
+            f"{percentile(values, 0.99) * 1000:>10.2f}"
+        )
+    lines.append(f"total: {total} updates in {elapsed:.2f}s, {total / elapsed:.1f} updates/s")
+    lines.append(f"bot api calls: {dict(calls)}")
+    print("\n".join(lines))
+
+
+async def replay(
+    dp: Dispatcher,
+    bot: Bot,
+    flows: Iterable[list[dict[str, Any]]],
+    concurrency: int,
+) -> tuple[dict[str, list[float]], float]:
+    """
+    Прогнать апдейты через диспетчер. Апдейты одного потока подаются последовательно,
+    потоки — параллельно, не больше `concurrency` одновременно.
+    Задержка апдейта — от входа в outer middleware до commit, относится к выбранному хендлеру.
+    """
+    latencies: dict[str, list[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_flow(flow: list[dict[str, Any]]) -> None:
+        async with semaphore:
+            for payload in flow:
+                update = Update.model_validate(payload, context={"bot": bot})
+                probe = {"handler": UNHANDLED}
+                started = time.perf_counter()
+                await dp.feed_update(bot, update, bench_probe=probe)
+                latencies[probe["handler"]].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_flow(flow) for flow in flows))
+    return latencies, time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> None:
+    await prepare_database()
+    session = FakeSession(latency=args.latency)
+    bot = Bot(token="42:BENCHMARK", session=session)
+    dp = create_dispatcher()
+    for observer in (dp.message, dp.callback_query, dp.inline_query):
+        observer.middleware(HandlerProbe())
+
+    try:
+        if args.updates:
+            flows = recorded_flows(args.updates)
+        else:
+            assignee_id = await seed_assignee()
+            flows = [
+                task_flow(TELEGRAM_ID_BASE + user, assignee_id) for user in range(1, args.users + 1)
+            ]
+        if args.warmup:
+            await replay(dp, bot, flows[: args.warmup], args.concurrency)
+        latencies, elapsed = await replay(dp, bot, flows, args.concurrency)
+        report(latencies, elapsed, session.calls)
+    finally:
+        await dp.storage.close()
+        if not args.keep_data:
+            await cleanup()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=100, help="синтетических пользователей")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--updates", help="файл записанных апдейтов (JSON lines)")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка Bot API, с")
+    parser.add_argument("--warmup", type=int, default=0, help="потоков для прогрева")
+    parser.add_argument("--keep-data", action="store_true", help="не удалять данные прогона")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Шардированная обработка апдейтов с локальным фейковым источником: синтетические диалоги
+создания задач раскладываются по процессам-воркерам, Bot API в воркерах — фейковый.
+
+    python -m benchmarks.sharded --workers 4 --users 400
+    python -m benchmarks.sharded --workers 2 --add-worker-after 200
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from itertools import chain, zip_longest
+from typing import Any
+
+from src.api.db.database import engine
+from src.app import prepare_database
+from src.sharding.runner import ShardedRunner
+from src.sharding.sources import iterable_source
+
+from .replay import TELEGRAM_ID_BASE, cleanup, seed_assignee, task_flow
+
+
+async def run(args: argparse.Namespace) -> None:
+    await prepare_database()
+    assignee_id = await seed_assignee()
+    flows = [task_flow(TELEGRAM_ID_BASE + user, assignee_id) for user in range(1, args.users + 1)]
+    # Диалоги перемешаны между собой, порядок внутри каждого сохранён
+    updates = [u for u in chain.from_iterable(zip_longest(*flows)) if u is not None]
+
+    runner = ShardedRunner(args.workers, bot_factory="benchmarks.replay:create_fake_bot")
+
+    async def source() -> AsyncIterator[dict[str, Any]]:
+        async for number, update in aiter_enumerate(iterable_source(updates)):
+            if number == args.add_worker_after:
+                await runner.add_worker()
+            yield update
+
+    started = time.perf_counter()
+    try:
+        await runner.run(source())
+    finally:
+        elapsed = time.perf_counter() - started
+        await cleanup()
+        await engine.dispose()
+    print(
+        f"{runner.routed} updates via {args.workers} workers in {elapsed:.2f}s, "
+        f"{runner.routed / elapsed:.1f} updates/s; ring: {sorted(runner.ring.nodes)}"
+    )
+
+
+async def aiter_enumerate(source: AsyncIterator[Any]) -> AsyncIterator[tuple[int, Any]]:
+    number = 0
+    async for item in source:
+        yield number, item
+        number += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--add-worker-after", type=int, default=-1, help="апдейтов до ребаланса")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,102 @@ class Settings(BaseSettings):
     is_test: bool = Field(..., env="IS_TEST")
     log_level: str = Field(..., env="LOG_LEVEL")
 
+    # Пул соединений с БД
+    db_pool_size: int = Field(10, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(20, env="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, env="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, env="DB_POOL_RECYCLE")
+    db_pool_pre_ping: bool = Field(True, env="DB_POOL_PRE_PING")
+    # Порог (сек.), после которого ожидание соединения пишется в лог
+    db_pool_slow_checkout: float = Field(0.5, env="DB_POOL_SLOW_CHECKOUT")
+    # Интервал (сек.) периодического лога состояния пула, 0 — выключено
+    db_pool_log_interval: float = Field(0, env="DB_POOL_LOG_INTERVAL")
+    # Применять миграции схемы при старте (иначе: python -m src.api.db.migrations)
+    db_auto_migrate: bool = Field(True, env="DB_AUTO_MIGRATE")
+    # Открыть соединения пула и загрузить кэши при старте, до первого апдейта
+    prewarm: bool = Field(False, env="PREWARM")
+    # Лог запросов дольше заданного (сек.) вместе с параметрами, 0 — выключено
+    db_slow_query: float = Field(0.5, env="DB_SLOW_QUERY")
+    # Трассировка запросов по апдейтам: предупреждение при превышении числа запросов
+    # или повторе одной формы запроса (N+1); 0 — проверка выключена
+    db_trace: bool = Field(False, env="DB_TRACE")
+    db_trace_max_queries: int = Field(20, env="DB_TRACE_MAX_QUERIES")
+    db_trace_max_repeats: int = Field(5, env="DB_TRACE_MAX_REPEATS")
+
+    # FSM storage: memory | db
+    fsm_storage: str = Field("memory", env="FSM_STORAGE")
+    fsm_cache_size: int = Field(10_000, env="FSM_CACHE_SIZE")
+    # TTL кэша (сек.), 0 — без ограничения. Если апдейты одного чата могут попасть
+    # в разные процессы, кэш нужно отключить (FSM_CACHE_SIZE=0) или ограничить TTL.
+    fsm_cache_ttl: float = Field(0, env="FSM_CACHE_TTL")
+    # Задержка (сек.), за которую изменения одного шага диалога сливаются в одну запись
+    fsm_flush_delay: float = Field(0.05, env="FSM_FLUSH_DELAY")
+
+    # Режим получения апдейтов: polling | webhook; scheduler — только планировщики (entrypoint.sh)
+    run_mode: str = Field("polling", env="RUN_MODE")
+    # Внешний адрес бота; если пуст, setWebhook не вызывается (удобно для локальной отладки)
+    webhook_base_url: str = Field("", env="WEBHOOK_BASE_URL")
+    webhook_path: str = Field("/telegram/webhook", env="WEBHOOK_PATH")
+    webhook_secret: str = Field("", env="WEBHOOK_SECRET")
+    webhook_host: str = Field("0.0.0.0", env="WEBHOOK_HOST")
+    webhook_port: int = Field(8080, env="WEBHOOK_PORT")
+    # Максимум апдейтов, обрабатываемых одновременно в одном процессе
+    max_concurrent_updates: int = Field(100, env="MAX_CONCURRENT_UPDATES")
+    # Число процессов-воркеров с шардированием апдейтов по чатам; 1 — один процесс
+    shard_workers: int = Field(1, env="SHARD_WORKERS")
+    # Запускать планировщики (напоминания, дайджесты) в воркерах gunicorn; по умолчанию
+    # они работают в отдельном процессе python -m src.scheduler (RUN_MODE=scheduler)
+    web_workers_schedulers: bool = Field(False, env="WEB_WORKERS_SCHEDULERS")
+
+    # Напоминания о событиях. Из нескольких процессов рассылает один (advisory lock);
+    # отдельным процессом: python -m src.scheduler
+    reminders_enabled: bool = Field(True, env="REMINDERS_ENABLED")
+    # Ширина окна (сек.), на которое напоминания загружаются из БД за один запрос
+    reminders_window: float = Field(3600, env="REMINDERS_WINDOW")
+
+    # Дайджесты просроченных задач
+    overdue_sweeper_enabled: bool = Field(True, env="OVERDUE_SWEEPER_ENABLED")
+    # Период проходов и окно «скоро срок», в секундах; размер пачки чтения задач
+    overdue_sweep_interval: float = Field(300, env="OVERDUE_SWEEP_INTERVAL")
+    overdue_due_soon: float = Field(86400, env="OVERDUE_DUE_SOON")
+    overdue_batch_size: int = Field(500, env="OVERDUE_BATCH_SIZE")
+    # Запаздывание (сек.) чтения изменённых задач: запас на транзакции, не успевшие
+    # зафиксироваться к проходу
+    overdue_change_lag: float = Field(60, env="OVERDUE_CHANGE_LAG")
+
+    # Рассылка уведомлений: лимиты Bot API (сообщений в секунду) и размер пула отправителей
+    notify_global_rate: float = Field(25, env="NOTIFY_GLOBAL_RATE")
+    notify_chat_rate: float = Field(1, env="NOTIFY_CHAT_RATE")
+    notify_workers: int = Field(16, env="NOTIFY_WORKERS")
+    notify_max_attempts: int = Field(3, env="NOTIFY_MAX_ATTEMPTS")
+
+    # Доставка из outbox: воркер в процессе бота (или python -m src.notifications.outbox)
+    outbox_enabled: bool = Field(True, env="OUTBOX_ENABLED")
+    outbox_workers: int = Field(8, env="OUTBOX_WORKERS")
+    outbox_batch_size: int = Field(100, env="OUTBOX_BATCH_SIZE")
+    # Опрос очереди (сек.), если новых сообщений не было; аренда взятой пачки (сек.)
+    outbox_poll_interval: float = Field(5, env="OUTBOX_POLL_INTERVAL")
+    outbox_lease: float = Field(60, env="OUTBOX_LEASE")
+    # Повторы: задержка base * 2^(n-1) сек., не больше max
+    outbox_max_attempts: int = Field(8, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_backoff_base: float = Field(2, env="OUTBOX_BACKOFF_BASE")
+    outbox_backoff_max: float = Field(600, env="OUTBOX_BACKOFF_MAX")
+
+    # Кэш эффективных прав пользователей; TTL в секундах, 0 — без ограничения
+    permissions_cache_size: int = Field(10_000, env="PERMISSIONS_CACHE_SIZE")
+    permissions_cache_ttl: float = Field(300, env="PERMISSIONS_CACHE_TTL")
+
+    # Кэш пользователей по telegram_id; TTL в секундах, 0 — без ограничения
+    users_cache_size: int = Field(10_000, env="USERS_CACHE_SIZE")
+    users_cache_ttl: float = Field(600, env="USERS_CACHE_TTL")
+
+    # Метрики Prometheus на http://METRICS_HOST:METRICS_PORT/metrics; 0 — выключены.
+    # Каждый процесс (воркер gunicorn, шард) занимает первый свободный порт
+    # из METRICS_PORT..METRICS_PORT+METRICS_PORT_SPAN-1
+    metrics_host: str = Field("127.0.0.1", env="METRICS_HOST")
+    metrics_port: int = Field(0, env="METRICS_PORT")
+    metrics_port_span: int = Field(16, env="METRICS_PORT_SPAN")
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
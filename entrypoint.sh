@@ -1,3 +1,14 @@
 #!/usr/bin/env bash
 
+if [ "${RUN_MODE}" = "scheduler" ]; then
+    exec python -m src.scheduler
+fi
+
+if [ "${RUN_MODE}" = "webhook" ] && [ "${WEB_WORKERS:-1}" -gt 1 ]; then
+    exec gunicorn "src.webhook:create_app" \
+        --worker-class aiohttp.GunicornWebWorker \
+        --workers "${WEB_WORKERS}" \
+        --bind "${WEBHOOK_HOST:-0.0.0.0}:${WEBHOOK_PORT:-8080}"
+fi
+
 python -m src.app
@@ -1,8 +1,12 @@
+import asyncio
 import functools
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import asynccontextmanager
 
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -10,15 +14,120 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import DeclarativeBase
 
 from config import settings
+from src.log import logger
 
-if settings.is_test:
-    engine = create_async_engine(url=settings.test_db_url)
-else:
-    engine = create_async_engine(url=settings.db_url)
+from .pool import InstrumentedPool
+from .tracing import install_query_tracing
+
+engine = create_async_engine(
+    url=settings.test_db_url if settings.is_test else settings.db_url,
+    poolclass=InstrumentedPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+install_query_tracing(engine)
 
 async_session = async_sessionmaker(engine, expire_on_commit=False)
 
 
+async def warm_pool(connections: int) -> None:
+    """Открыть `connections` соединений заранее, чтобы первые апдейты не ждали подключения."""
+
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Соединения держатся одновременно — иначе пул переиспользует одно и то же
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def run_as_leader(
+    name: str, work: Callable[[], Awaitable[None]], check_interval: float = 30.0
+) -> None:
+    """
+    Выполнять `work`, только пока процесс держит advisory lock `name`: из процессов
+    с одним именем работает один, остальные раз в `check_interval` пробуют его сменить.
+    Блокировка привязана к соединению — оно держится открытым и проверяется тем же
+    интервалом; при его потере `work` останавливается и выборы начинаются заново.
+    """
+    while True:
+        try:
+            async with engine.connect() as conn:
+                acquired = await conn.scalar(
+                    text("SELECT pg_try_advisory_lock(hashtext(:name))"), {"name": name}
+                )
+                # Не держать открытую транзакцию: блокировка уровня сессии её не требует
+                await conn.commit()
+                if acquired:
+                    logger.info(f"Acquired leader lock {name!r}")
+                    await _hold_leader_lock(conn, work, check_interval)
+                    return
+        except (SQLAlchemyError, OSError):
+            logger.exception(f"Leader lock {name!r} lost")
+        await asyncio.sleep(check_interval)
+
+
+async def _hold_leader_lock(
+    conn: AsyncConnection, work: Callable[[], Awaitable[None]], check_interval: float
+) -> None:
+    task = asyncio.ensure_future(work())
+    try:
+        while True:
+            done, _ = await asyncio.wait([task], timeout=check_interval)
+            if done:
+                return task.result()
+            await conn.execute(text("SELECT 1"))
+            await conn.commit()
+    finally:
+        task.cancel()
+        # Закрыть соединение, а не вернуть в пул: вместе с ним освобождается блокировка
+        await conn.invalidate()
+
+
+async def notify(session: AsyncSession, channel: str, payloads: Iterable[object]) -> None:
+    """
+    NOTIFY в транзакции сессии: слушатели получат сообщения только после commit,
+    одинаковые сообщения одной транзакции Postgres доставляет один раз.
+    """
+    payloads = sorted({str(payload) for payload in payloads})
+    if payloads:
+        await session.execute(
+            text(
+                "SELECT pg_notify(:channel, payload) "
+                "FROM unnest(CAST(:payloads AS text[])) AS payload"
+            ),
+            {"channel": channel, "payloads": payloads},
+        )
+
+
+@asynccontextmanager
+async def listen(channel: str, callback: Callable[[str], None]) -> AsyncIterator[None]:
+    """
+    LISTEN `channel`, пока открыт контекст: `callback` получает payload каждого NOTIFY
+    из любого процесса. Для подписки держится отдельное соединение пула.
+    """
+
+    def on_notify(_connection: object, _pid: int, _channel: str, payload: str) -> None:
+        callback(payload)
+
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.add_listener(channel, on_notify)
+        try:
+            yield
+        finally:
+            # Закрыть соединение, а не вернуть в пул: вместе с ним снимается подписка
+            await conn.invalidate()
+
+
+def pool_status() -> dict[str, float]:
+    """Снимок состояния пула: выдано, overflow, ожидающие, время ожидания."""
+    return engine.pool.snapshot()
+
+
 async def get_session() -> AsyncGenerator[AsyncSession]:
     async with async_session() as session:
         try:
@@ -34,10 +143,50 @@ class Base(DeclarativeBase):
     metadata = metadata
 
 
+# Ключи session.info: транзакцией управляет внешний код (middleware, `connection`),
+# сервисы только сбрасывают изменения, а колбэки ждут общего commit
+MANAGED_TRANSACTION = "managed_transaction"
+AFTER_COMMIT = "after_commit"
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[AsyncSession]:
+    """Одна сессия и одна транзакция: commit в конце, rollback при ошибке."""
+    async with async_session() as session:
+        session.info[MANAGED_TRANSACTION] = True
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        for callback in session.info.pop(AFTER_COMMIT, ()):
+            callback()
+
+
+async def commit(session: AsyncSession, *after_commit: Callable[[], None]) -> None:
+    """
+    Зафиксировать изменения сервиса. Внутри `session_scope` изменения только
+    сбрасываются в БД (flush), а `after_commit` выполняются после общего commit.
+    """
+    session.info.setdefault(AFTER_COMMIT, []).extend(after_commit)
+    if session.info.get(MANAGED_TRANSACTION):
+        await session.flush()
+        return
+    await session.commit()
+    for callback in session.info.pop(AFTER_COMMIT, ()):
+        callback()
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Выполнить `callback` после ближайшего commit сессии (своего или `session_scope`)."""
+    session.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+
 def connection(func):
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
-        async with async_session() as session:
+        async with session_scope() as session:
             kwargs["session"] = session
             return await func(*args, **kwargs)
 
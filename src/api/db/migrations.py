@@ -0,0 +1,435 @@
+"""
+Версионные миграции схемы.
+
+Текущая версия хранится одной строкой в schema_version; на старте выполняется один
+SELECT, и только при отставании миграции применяются под advisory lock в одной транзакции.
+DDL миграций записан текстом и не зависит от текущих моделей: изменение модели попадает
+в схему только новой миграцией, а старые выполняются на любой базе одинаково.
+Запуск вручную: python -m src.api.db.migrations
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+from sqlalchemy import Column, Integer, MetaData, Table, insert, select, text, update
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateSchema, CreateTable
+
+from src.log import logger
+
+from .database import engine, metadata
+
+SCHEMA = metadata.schema
+# Ключ pg_advisory_xact_lock: миграции не выполняются параллельно из нескольких процессов
+LOCK_KEY = 7_245_001
+
+schema_version = Table(
+    "schema_version",
+    MetaData(schema=SCHEMA),
+    Column("version", Integer, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[AsyncConnection], Awaitable[None]]
+
+
+async def _execute(conn: AsyncConnection, *statements: str) -> None:
+    """Выполнить DDL по порядку; имена без схемы разрешаются через search_path миграции."""
+    for statement in statements:
+        await conn.execute(text(statement))
+
+
+# Схема на момент введения миграций: исходные таблицы и добавленные до миграций
+# fsm_storage и time_tracking_rollups. Счётчики голосов и индексы — миграции 2 и 3.
+BASELINE = (
+    """
+    CREATE TABLE IF NOT EXISTS event_types (
+        id SERIAL NOT NULL,
+        name VARCHAR NOT NULL,
+        description TEXT,
+        default_reminder_15min BOOLEAN,
+        default_reminder_1h BOOLEAN,
+        default_reminder_1d BOOLEAN,
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fsm_storage (
+        key VARCHAR NOT NULL,
+        state VARCHAR,
+        data TEXT,
+        updated_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (key)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS permissions (
+        id SERIAL NOT NULL,
+        code VARCHAR NOT NULL,
+        description TEXT,
+        PRIMARY KEY (id),
+        UNIQUE (code)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS roles (
+        id SERIAL NOT NULL,
+        name VARCHAR NOT NULL,
+        description TEXT,
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS role_permissions (
+        role_id INTEGER NOT NULL,
+        permission_id INTEGER NOT NULL,
+        PRIMARY KEY (role_id, permission_id),
+        FOREIGN KEY (role_id) REFERENCES roles (id) ON DELETE CASCADE,
+        FOREIGN KEY (permission_id) REFERENCES permissions (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id SERIAL NOT NULL,
+        telegram_id BIGINT NOT NULL,
+        username VARCHAR,
+        full_name VARCHAR,
+        role_id INTEGER,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        UNIQUE (telegram_id),
+        FOREIGN KEY (role_id) REFERENCES roles (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS access_rights (
+        id SERIAL NOT NULL,
+        user_id INTEGER,
+        permission_id INTEGER,
+        granted_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY (permission_id) REFERENCES permissions (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS documents (
+        id SERIAL NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        status VARCHAR NOT NULL,
+        file_url VARCHAR,
+        created_by INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        id SERIAL NOT NULL,
+        title VARCHAR NOT NULL,
+        description TEXT,
+        event_type_id INTEGER,
+        start_time TIMESTAMP WITHOUT TIME ZONE,
+        end_time TIMESTAMP WITHOUT TIME ZONE,
+        location VARCHAR,
+        created_by INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY (event_type_id) REFERENCES event_types (id),
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS polls (
+        id SERIAL NOT NULL,
+        question TEXT NOT NULL,
+        created_by INTEGER,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY (created_by) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id SERIAL NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        deadline TIMESTAMP WITHOUT TIME ZONE,
+        created_by INTEGER,
+        assigned_to INTEGER,
+        is_completed BOOLEAN,
+        completed_at TIMESTAMP WITHOUT TIME ZONE,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY (created_by) REFERENCES users (id),
+        FOREIGN KEY (assigned_to) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS time_tracking (
+        id SERIAL NOT NULL,
+        user_id INTEGER,
+        description TEXT,
+        started_at TIMESTAMP WITHOUT TIME ZONE,
+        ended_at TIMESTAMP WITHOUT TIME ZONE,
+        duration INTERVAL,
+        PRIMARY KEY (id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS time_tracking_rollups (
+        id SERIAL NOT NULL,
+        user_id INTEGER NOT NULL,
+        period VARCHAR NOT NULL,
+        period_start DATE NOT NULL,
+        duration INTERVAL NOT NULL,
+        entries INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        CONSTRAINT uix_time_tracking_rollup UNIQUE (user_id, period, period_start),
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS chat_notifications (
+        id SERIAL NOT NULL,
+        user_id INTEGER,
+        event_id INTEGER,
+        sent_at TIMESTAMP WITHOUT TIME ZONE,
+        chat_type VARCHAR NOT NULL,
+        message TEXT,
+        PRIMARY KEY (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (event_id) REFERENCES events (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS document_approvals (
+        id SERIAL NOT NULL,
+        document_id INTEGER,
+        approver_id INTEGER,
+        approved BOOLEAN,
+        approved_at TIMESTAMP WITHOUT TIME ZONE,
+        order_index INTEGER,
+        PRIMARY KEY (id),
+        FOREIGN KEY (document_id) REFERENCES documents (id),
+        FOREIGN KEY (approver_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS event_participants (
+        id SERIAL NOT NULL,
+        event_id INTEGER,
+        user_id INTEGER,
+        reminder_15min BOOLEAN,
+        reminder_1h BOOLEAN,
+        reminder_1d BOOLEAN,
+        PRIMARY KEY (id),
+        FOREIGN KEY (event_id) REFERENCES events (id),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS poll_options (
+        id SERIAL NOT NULL,
+        poll_id INTEGER,
+        option_text TEXT NOT NULL,
+        PRIMARY KEY (id),
+        CONSTRAINT uix_poll_option UNIQUE (poll_id, option_text),
+        FOREIGN KEY (poll_id) REFERENCES polls (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS poll_responses (
+        id SERIAL NOT NULL,
+        poll_id INTEGER,
+        user_id INTEGER,
+        option_id INTEGER,
+        responded_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (id),
+        FOREIGN KEY (poll_id) REFERENCES polls (id),
+        FOREIGN KEY (user_id) REFERENCES users (id),
+        FOREIGN KEY (option_id) REFERENCES poll_options (id)
+    )
+    """,
+)
+
+
+async def _baseline(conn: AsyncConnection) -> None:
+    # Таблицы, которых ещё нет; существующие (созданные create_all до миграций) не трогаются
+    await _execute(conn, *BASELINE)
+
+
+async def _poll_tallies(conn: AsyncConnection) -> None:
+    await _execute(
+        conn,
+        "ALTER TABLE poll_options ADD COLUMN IF NOT EXISTS votes_count integer NOT NULL DEFAULT 0",
+        # Один голос на пользователя: оставить последний ответ
+        """
+        DELETE FROM poll_responses r USING poll_responses newer
+        WHERE r.poll_id = newer.poll_id AND r.user_id = newer.user_id AND r.id < newer.id
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uix_poll_response_user "
+        "ON poll_responses (poll_id, user_id)",
+        """
+        UPDATE poll_options o
+        SET votes_count = (SELECT count(*) FROM poll_responses r WHERE r.option_id = o.id)
+        """,
+    )
+
+
+async def _hot_path_indexes(conn: AsyncConnection) -> None:
+    await _execute(
+        conn,
+        "CREATE INDEX IF NOT EXISTS ix_users_role_id ON users (role_id)",
+        "CREATE INDEX IF NOT EXISTS ix_users_username_lower "
+        "ON users (lower(username) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_users_full_name_lower "
+        "ON users (lower(full_name) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_access_rights_user_id ON access_rights (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_events_start_time ON events (start_time)",
+        "CREATE INDEX IF NOT EXISTS ix_event_participants_event_id "
+        "ON event_participants (event_id)",
+        "CREATE INDEX IF NOT EXISTS ix_event_participants_user_id ON event_participants (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_assigned_to ON tasks (assigned_to)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_created_by ON tasks (created_by)",
+        # Заменён в миграции 4; остаётся здесь, чтобы миграция 3 не менялась задним числом
+        "CREATE INDEX IF NOT EXISTS ix_tasks_open_by_assignee "
+        "ON tasks (assigned_to, deadline) WHERE is_completed IS false",
+        "CREATE INDEX IF NOT EXISTS ix_time_tracking_user_id ON time_tracking (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_documents_created_by ON documents (created_by)",
+        "CREATE INDEX IF NOT EXISTS ix_document_approvals_chain "
+        "ON document_approvals (document_id, order_index)",
+        "CREATE INDEX IF NOT EXISTS ix_document_approvals_pending_approver "
+        "ON document_approvals (approver_id) WHERE approved_at IS NULL",
+        "CREATE INDEX IF NOT EXISTS ix_chat_notifications_user_id "
+        "ON chat_notifications (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_chat_notifications_event_id "
+        "ON chat_notifications (event_id)",
+        "CREATE INDEX IF NOT EXISTS ix_poll_responses_option_id ON poll_responses (option_id)",
+    )
+
+
+async def _task_list_indexes(conn: AsyncConnection) -> None:
+    await _execute(
+        conn,
+        # (assigned_to, deadline) не годится для keyset по дедлайну с NULL — заменяем
+        "DROP INDEX IF EXISTS ix_tasks_open_by_assignee",
+        """
+        CREATE INDEX IF NOT EXISTS ix_tasks_open_by_assignee_deadline
+        ON tasks (assigned_to, coalesce(deadline, 'infinity'::timestamp), id)
+        WHERE is_completed IS false
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS ix_tasks_open_by_deadline
+        ON tasks (coalesce(deadline, 'infinity'::timestamp), id)
+        WHERE is_completed IS false
+        """,
+    )
+
+
+async def _overdue_sweeper(conn: AsyncConnection) -> None:
+    await _execute(
+        conn,
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS updated_at timestamp",
+        "UPDATE tasks SET updated_at = created_at WHERE updated_at IS NULL",
+        """
+        CREATE TABLE IF NOT EXISTS job_state (
+            name VARCHAR NOT NULL,
+            ran_until TIMESTAMP WITHOUT TIME ZONE,
+            changed_until TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (name)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_tasks_open_updated_at "
+        "ON tasks (updated_at) WHERE is_completed IS false",
+    )
+
+
+async def _outbox(conn: AsyncConnection) -> None:
+    await _execute(
+        conn,
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id SERIAL NOT NULL,
+            idempotency_key VARCHAR NOT NULL,
+            chat_id BIGINT NOT NULL,
+            user_id INTEGER,
+            text TEXT NOT NULL,
+            status VARCHAR NOT NULL,
+            attempts INTEGER NOT NULL,
+            next_attempt_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            last_error TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            sent_at TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id),
+            UNIQUE (idempotency_key),
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_outbox_pending "
+        "ON outbox (next_attempt_at, id) WHERE status = 'pending'",
+    )
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema", _baseline),
+    Migration(2, "poll tallies and one vote per user", _poll_tallies),
+    Migration(3, "hot-path indexes", _hot_path_indexes),
+    Migration(4, "open task list indexes", _task_list_indexes),
+    Migration(5, "task updated_at and job state for the overdue sweeper", _overdue_sweeper),
+    Migration(6, "transactional outbox", _outbox),
+]
+LATEST = MIGRATIONS[-1].version
+
+
+async def current_version(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        try:
+            return await conn.scalar(select(schema_version.c.version)) or 0
+        except ProgrammingError:
+            return 0
+
+
+async def migrate(engine: AsyncEngine = engine) -> int:
+    """Довести схему до последней версии. Возвращает версию после миграции."""
+    version = await current_version(engine)
+    if version >= LATEST:
+        return version
+
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+        await conn.execute(CreateSchema(SCHEMA, if_not_exists=True))
+        await conn.execute(
+            text("SELECT set_config('search_path', :schema, true)"), {"schema": SCHEMA}
+        )
+        await conn.execute(CreateTable(schema_version, if_not_exists=True))
+        version = await conn.scalar(select(schema_version.c.version))
+        if version is None:
+            version = 0
+            await conn.execute(insert(schema_version).values(version=0))
+
+        for migration in MIGRATIONS:
+            if migration.version <= version:
+                continue
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            await migration.apply(conn)
+            version = migration.version
+
+        await conn.execute(update(schema_version).values(version=version))
+    return version
+
+
+if __name__ == "__main__":
+    logger.info(f"Schema version: {asyncio.run(migrate())}")
@@ -4,14 +4,18 @@ from sqlalchemy import (
     BigInteger,
     Boolean,
     Column,
+    Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Interval,
     String,
     Table,
     Text,
     UniqueConstraint,
+    func,
+    text,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -53,6 +57,7 @@ class Permission(Base):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_role_id", "role_id"),)
 
     id = Column(Integer, primary_key=True)
     telegram_id = Column(BigInteger, unique=True, nullable=False)
@@ -77,8 +82,23 @@ class User(Base):
     poll_responses = relationship("PollResponse", back_populates="user")
 
 
+# Префиксный поиск пользователей (inline-подсказки при назначении задач):
+# lower(...) LIKE 'query%' использует btree-индекс с text_pattern_ops.
+Index(
+    "ix_users_username_lower",
+    func.lower(User.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+)
+Index(
+    "ix_users_full_name_lower",
+    func.lower(User.full_name).label("full_name_lower"),
+    postgresql_ops={"full_name_lower": "text_pattern_ops"},
+)
+
+
 class AccessRight(Base):
     __tablename__ = "access_rights"
+    __table_args__ = (Index("ix_access_rights_user_id", "user_id"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -104,6 +124,7 @@ class EventType(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (Index("ix_events_start_time", "start_time"),)
 
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
@@ -122,6 +143,10 @@ class Event(Base):
 
 class EventParticipant(Base):
     __tablename__ = "event_participants"
+    __table_args__ = (
+        Index("ix_event_participants_event_id", "event_id"),
+        Index("ix_event_participants_user_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     event_id = Column(Integer, ForeignKey("events.id"))
@@ -136,6 +161,30 @@ class EventParticipant(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_assigned_to", "assigned_to"),
+        Index("ix_tasks_created_by", "created_by"),
+        # Открытые задачи по дедлайну (без дедлайна — в конце) для keyset-пагинации списков
+        Index(
+            "ix_tasks_open_by_assignee_deadline",
+            "assigned_to",
+            text("coalesce(deadline, 'infinity'::timestamp)"),
+            "id",
+            postgresql_where=text("is_completed IS false"),
+        ),
+        Index(
+            "ix_tasks_open_by_deadline",
+            text("coalesce(deadline, 'infinity'::timestamp)"),
+            "id",
+            postgresql_where=text("is_completed IS false"),
+        ),
+        # Открытые задачи, изменённые после отметки свипера просроченных задач
+        Index(
+            "ix_tasks_open_updated_at",
+            "updated_at",
+            postgresql_where=text("is_completed IS false"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     title = Column(Text, nullable=False)
@@ -146,6 +195,7 @@ class Task(Base):
     is_completed = Column(Boolean, default=False)
     completed_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     creator = relationship("User", back_populates="tasks_created", foreign_keys=[created_by])
     assignee = relationship("User", back_populates="tasks_assigned", foreign_keys=[assigned_to])
@@ -153,6 +203,7 @@ class Task(Base):
 
 class TimeTracking(Base):
     __tablename__ = "time_tracking"
+    __table_args__ = (Index("ix_time_tracking_user_id", "user_id"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -164,8 +215,25 @@ class TimeTracking(Base):
     user = relationship("User", back_populates="time_entries")
 
 
+class TimeTrackingRollup(Base):
+    """Сумма учтённого времени пользователя за день или неделю (period = day | week)."""
+
+    __tablename__ = "time_tracking_rollups"
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", "period_start", name="uix_time_tracking_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period = Column(String, nullable=False)
+    period_start = Column(Date, nullable=False)
+    duration = Column(Interval, nullable=False)
+    entries = Column(Integer, nullable=False, default=0)
+
+
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (Index("ix_documents_created_by", "created_by"),)
 
     id = Column(Integer, primary_key=True)
     title = Column(Text, nullable=False)
@@ -181,6 +249,15 @@ class Document(Base):
 
 class DocumentApproval(Base):
     __tablename__ = "document_approvals"
+    __table_args__ = (
+        Index("ix_document_approvals_chain", "document_id", "order_index"),
+        # Согласования, ожидающие решения конкретного согласующего
+        Index(
+            "ix_document_approvals_pending_approver",
+            "approver_id",
+            postgresql_where=text("approved_at IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     document_id = Column(Integer, ForeignKey("documents.id"))
@@ -195,6 +272,10 @@ class DocumentApproval(Base):
 
 class ChatNotification(Base):
     __tablename__ = "chat_notifications"
+    __table_args__ = (
+        Index("ix_chat_notifications_user_id", "user_id"),
+        Index("ix_chat_notifications_event_id", "event_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -227,6 +308,8 @@ class PollOption(Base):
     id = Column(Integer, primary_key=True)
     poll_id = Column(Integer, ForeignKey("polls.id"))
     option_text = Column(Text, nullable=False)
+    # Счётчик голосов, поддерживается PollResponseService
+    votes_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     poll = relationship("Poll", back_populates="options")
     responses = relationship("PollResponse", back_populates="option")
@@ -234,6 +317,10 @@ class PollOption(Base):
 
 class PollResponse(Base):
     __tablename__ = "poll_responses"
+    __table_args__ = (
+        UniqueConstraint("poll_id", "user_id", name="uix_poll_response_user"),
+        Index("ix_poll_responses_option_id", "option_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     poll_id = Column(Integer, ForeignKey("polls.id"))
@@ -244,3 +331,57 @@ class PollResponse(Base):
     poll = relationship("Poll", back_populates="responses")
     user = relationship("User", back_populates="poll_responses")
     option = relationship("PollOption", back_populates="responses")
+
+
+class FsmRecord(Base):
+    """Состояние и данные FSM aiogram (см. src/fsm/storage.py)."""
+
+    __tablename__ = "fsm_storage"
+
+    key = Column(String, primary_key=True)
+    state = Column(String)
+    data = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+
+class JobState(Base):
+    """Отметки (high-water mark) фоновых задач: до какого момента данные уже обработаны."""
+
+    __tablename__ = "job_state"
+
+    name = Column(String, primary_key=True)
+    # Локальное время: до него обработаны дедлайны
+    ran_until = Column(DateTime)
+    # UTC, как tasks.updated_at: до него обработаны изменения
+    changed_until = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class OutboxMessage(Base):
+    """
+    Исходящее сообщение Telegram, записанное в одной транзакции с изменением данных
+    (см. src/notifications/outbox.py). `idempotency_key` не даёт поставить одно
+    уведомление дважды; `next_attempt_at` — время следующей попытки или конец аренды.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending",
+            "next_attempt_at",
+            "id",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String, unique=True, nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    text = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime)
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections.abc import Callable
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from config import settings
+from src.log import logger
+
+
+class PoolStats:
+    """
+    Счётчики выдачи соединений из пула: число выдач, время ожидания, таймауты.
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.last_wait = waited
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool, который замеряет ожидание соединения и число ожидающих.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        stats = self.stats
+        stats.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            stats.timeouts += 1
+            logger.error(f"DB pool exhausted: {self.snapshot()}")
+            raise
+        finally:
+            stats.waiting -= 1
+            waited = time.perf_counter() - started
+            stats.record(waited)
+            if waited >= settings.db_pool_slow_checkout:
+                logger.warning(f"Slow DB pool checkout {waited:.3f}s: {self.snapshot()}")
+
+    def snapshot(self) -> dict[str, float]:
+        """Текущее состояние пула для логов и метрик."""
+        stats = self.stats
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "waiters": stats.waiting,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_avg": stats.wait_total / stats.checkouts if stats.checkouts else 0.0,
+            "wait_max": stats.wait_max,
+        }
+
+
+async def log_pool_status(snapshot: Callable[[], dict[str, float]], interval: float) -> None:
+    """Периодически писать состояние пула в лог."""
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"DB pool: {snapshot()}")
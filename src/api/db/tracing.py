@@ -0,0 +1,167 @@
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Connection, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import settings
+from src.log import logger
+
+_QUERY_STARTED = "trace_query_started"
+# Сколько символов параметров и запроса попадает в лог
+MAX_LOGGED = 1000
+
+# Наблюдатели запросов (метрики): (SQL, длительность), длительность None — запрос упал
+_observers: list[Callable[[str, float | None], None]] = []
+
+
+def _shorten(value: object) -> str:
+    text = " ".join(str(value).split())
+    return text if len(text) <= MAX_LOGGED else text[:MAX_LOGGED] + "…"
+
+
+class QueryTrace:
+    """
+    Запросы к БД в рамках одного апдейта (или блока `query_budget`).
+    Форма запроса — текст SQL с плейсхолдерами: повтор одной формы много раз за апдейт —
+    признак N+1. Запросы вложенной трассировки учитываются и во внешней.
+    """
+
+    def __init__(self, label: str, parent: "QueryTrace | None" = None) -> None:
+        self.label = label
+        self.parent = parent
+        self.handler: str | None = None
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+        self.handlers: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float, handler: str | None = None) -> None:
+        handler = handler or self.handler
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement] += 1
+        if handler:
+            self.handlers[handler] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration, handler)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Формы запросов, выполненные не меньше `threshold` раз."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def __str__(self) -> str:
+        target = f"{self.label}/{self.handler}" if self.handler else self.label
+        return f"{target}: {self.count} queries, {self.duration * 1000:.1f} ms"
+
+
+current_trace: ContextVar[QueryTrace | None] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def trace_queries(label: str) -> Iterator[QueryTrace]:
+    """Собирать запросы, выполненные в текущем контексте (апдейт, тест)."""
+    trace = QueryTrace(label, parent=current_trace.get())
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+
+
+def set_handler(name: str) -> None:
+    """Отнести дальнейшие запросы текущего апдейта к хендлеру `name`."""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.handler = name
+
+
+def check_trace(
+    trace: QueryTrace,
+    max_queries: int = settings.db_trace_max_queries,
+    max_repeats: int = settings.db_trace_max_repeats,
+) -> None:
+    """Предупредить, если апдейт превысил бюджет запросов или повторял одну форму (N+1)."""
+    if max_queries and trace.count > max_queries:
+        logger.warning(f"Query budget exceeded by {trace} (budget {max_queries})")
+    if max_repeats:
+        for shape, n in trace.repeated(max_repeats):
+            logger.warning(f"Possible N+1 in {trace}: {n}x {_shorten(shape)}")
+
+
+@contextmanager
+def query_budget(
+    max_queries: int, handler: str | None = None, max_repeats: int | None = None
+) -> Iterator[QueryTrace]:
+    """
+    Для тестов: упасть с AssertionError, если в блоке выполнено больше `max_queries`
+    запросов (только запросов хендлера `handler`, если он задан) или одна форма
+    запроса повторилась `max_repeats` раз.
+
+        with query_budget(2, handler="show_my_tasks"):
+            await dp.feed_update(bot, update)
+    """
+    with trace_queries("query_budget") as trace:
+        yield trace
+    # Не assert: проверка не должна пропадать при python -O
+    count = trace.handlers[handler] if handler else trace.count
+    if count > max_queries:
+        raise AssertionError(
+            f"{handler or 'block'} ran {count} queries, budget {max_queries}: "
+            f"{[_shorten(shape) for shape in trace.shapes]}"
+        )
+    repeated = trace.repeated(max_repeats) if max_repeats else []
+    if repeated:
+        raise AssertionError(f"Repeated queries (N+1): {repeated}")
+
+
+def _before_cursor_execute(conn: Connection, *args: object) -> None:
+    conn.info.setdefault(_QUERY_STARTED, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection,
+    cursor: object,
+    statement: str,
+    parameters: object,
+    *args: object,
+) -> None:
+    duration = time.perf_counter() - conn.info[_QUERY_STARTED].pop()
+    if settings.db_slow_query and duration >= settings.db_slow_query:
+        logger.warning(
+            f"Slow query {duration:.3f}s: {_shorten(statement)} params={_shorten(parameters)}"
+        )
+    trace = current_trace.get()
+    if trace is not None:
+        trace.record(statement, duration)
+    for observer in _observers:
+        observer(statement, duration)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    if context.connection is not None:
+        started = context.connection.info.get(_QUERY_STARTED)
+        if started:
+            started.pop()
+    for observer in _observers:
+        observer(context.statement or "", None)
+
+
+def observe_queries(observer: Callable[[str, float | None], None]) -> None:
+    """Передавать `observer` каждый выполненный запрос; повторная регистрация не дублирует."""
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def install_query_tracing(engine: AsyncEngine) -> None:
+    """Подключить трассировку и лог медленных запросов к движку."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -1,46 +1,169 @@
+import time
+
+# Отсчёт запуска — до импорта aiogram, SQLAlchemy и хендлеров, чтобы их время вошло в замер
+STARTED = time.perf_counter()
+
 import asyncio
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
 
 from config import settings
 from src.log import logger
+from src.utils.startup import startup_timer
 
-from .api.db.database import Base, engine
+from .api.db.database import async_session, engine, pool_status, warm_pool
+from .fsm.storage import build_storage
+from .keyboards import MAIN_MENU
+from .middlewares.concurrency import ConcurrencyLimitMiddleware
+from .middlewares.db import DbSessionMiddleware
+from .middlewares.user import UserMiddleware
 from .routes.tasks import register_task_handlers
 
 
-async def main() -> None:
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    # Initialize bot and dispatcher
-    bot = Bot(
+# /start and /menu handler
+async def cmd_start(message: types.Message) -> None:
+    await message.answer("Выберите раздел:", reply_markup=MAIN_MENU)
+
+
+async def prewarm() -> None:
+    """Открыть соединения пула и загрузить кэши до первого апдейта."""
+    from .objects.permission_resolver import permission_resolver
+
+    await warm_pool(settings.db_pool_size)
+    async with async_session() as session:
+        await permission_resolver.warm(session)
+
+
+async def on_startup(dispatcher: Dispatcher, bot: Bot) -> None:
+    # Фоновые задачи живут до остановки диспетчера
+    background_tasks: list[asyncio.Task] = []
+    if settings.db_pool_log_interval > 0:
+        from .api.db.pool import log_pool_status
+
+        background_tasks.append(
+            asyncio.create_task(log_pool_status(pool_status, settings.db_pool_log_interval))
+        )
+    dispatcher["background_tasks"] = background_tasks
+
+    if settings.metrics_port:
+        from .metrics.db import instrument_engine, pool_collector
+        from .metrics.registry import registry
+        from .metrics.server import fsm_collector, start_metrics_server
+
+        instrument_engine(engine)
+        registry.add_collector("db_pool", pool_collector(pool_status))
+        registry.add_collector("fsm_storage", fsm_collector(dispatcher.storage))
+        dispatcher["metrics_runner"] = await start_metrics_server(
+            settings.metrics_host, settings.metrics_port, settings.metrics_port_span
+        )
+
+    # Фоновые сервисы импортируются, только если включены
+    services = []
+    if settings.reminders_enabled:
+        from .scheduler.reminders import reminder_scheduler
+
+        services.append(reminder_scheduler)
+    if settings.overdue_sweeper_enabled:
+        from .scheduler.overdue import overdue_sweeper
+
+        services.append(overdue_sweeper)
+    if settings.outbox_enabled:
+        from .notifications.outbox import outbox_worker
+
+        services.append(outbox_worker)
+    for service in services:
+        service.start(bot)
+    dispatcher["services"] = services
+    startup_timer.mark("services")
+
+    if settings.prewarm:
+        await prewarm()
+        startup_timer.mark("prewarm")
+    startup_timer.report()
+
+
+async def on_shutdown(dispatcher: Dispatcher) -> None:
+    for task in dispatcher.workflow_data.get("background_tasks", []):
+        task.cancel()
+    for service in dispatcher.workflow_data.get("services", []):
+        await service.stop()
+    metrics_runner = dispatcher.workflow_data.get("metrics_runner")
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+
+
+async def prepare_database() -> None:
+    # Один SELECT версии схемы; миграции применяются, только если она отстала
+    if settings.db_auto_migrate:
+        from .api.db.migrations import migrate
+
+        await migrate()
+    startup_timer.mark("migrations")
+
+
+def create_bot() -> Bot:
+    return Bot(
         token=settings.telegram_token, default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    storage = MemoryStorage()
+
+
+def create_dispatcher() -> Dispatcher:
+    """Собрать диспетчер со всеми хендлерами; общий для polling и webhook."""
+    storage = build_storage()
     dp = Dispatcher(storage=storage)
+    if settings.metrics_port:
+        from .metrics.middleware import HandlerMetricsMiddleware, UpdateMetricsMiddleware
 
-    # /start and /menu handler
-    @dp.message(Command(commands=["start", "menu"]))
-    async def cmd_start(message: types.Message) -> None:
-        # Main menu keyboard
-        main_kb = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="📋 Задачи"), KeyboardButton(text="⏲️ Трекер времени")],
-                [KeyboardButton(text="📆 События"), KeyboardButton(text="📄 Документы")],
-                [KeyboardButton(text="⚙️ Настройки")],
-            ],
-            resize_keyboard=True,
-        )
-        await message.answer("Выберите раздел:", reply_markup=main_kb)
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        for observer in (dp.message, dp.callback_query, dp.inline_query):
+            observer.middleware(HandlerMetricsMiddleware())
+    dp.update.outer_middleware(ConcurrencyLimitMiddleware(settings.max_concurrent_updates))
+    # В тестах трассировка нужна для query_budget по хендлерам
+    if settings.db_trace or settings.is_test:
+        from .middlewares.query_trace import QueryHandlerMiddleware, QueryTraceMiddleware
+
+        dp.update.outer_middleware(QueryTraceMiddleware())
+        for observer in (dp.message, dp.callback_query, dp.inline_query):
+            observer.middleware(QueryHandlerMiddleware())
+    dp.update.outer_middleware(DbSessionMiddleware())
+    dp.update.outer_middleware(UserMiddleware())
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    dp.message.register(cmd_start, Command(commands=["start", "menu"]))
 
     # Register feature modules
     register_task_handlers(dp)
 
+    startup_timer.mark("dispatcher")
+    return dp
+
+
+async def main() -> None:
+    startup_timer.start(STARTED)
+    startup_timer.mark("imports")
+    await prepare_database()
+    # Initialize bot and dispatcher
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    if settings.shard_workers > 1:
+        from .sharding.runner import run_sharded
+
+        await run_sharded(bot, dp, settings.shard_workers)
+        return
+
+    if settings.run_mode == "webhook":
+        from .webhook import run_webhook
+
+        logger.info(f"Starting webhook server on {settings.webhook_host}:{settings.webhook_port}")
+        await run_webhook(bot, dp)
+        return
+
     # Start polling
     await dp.start_polling(bot)
 
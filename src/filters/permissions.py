@@ -0,0 +1,32 @@
+from aiogram.filters import Filter
+from aiogram.types import TelegramObject
+from aiogram.types import User as TelegramUser
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.db.models import User
+from src.objects.permission_resolver import permission_resolver
+
+
+class HasPermission(Filter):
+    """
+    Пропускает апдейт, если у отправителя есть все указанные права (Permission.code).
+    В установившемся режиме проверка идёт по кэшу без запросов к БД.
+    """
+
+    def __init__(self, *codes: str) -> None:
+        self.codes = codes
+
+    async def __call__(
+        self,
+        event: TelegramObject,
+        event_from_user: TelegramUser | None = None,
+        session: AsyncSession | None = None,
+        user: User | None = None,
+    ) -> bool:
+        if user is not None:
+            return await permission_resolver.has(*self.codes, user_id=user.id, session=session)
+        if event_from_user is None:
+            return False
+        return await permission_resolver.has(
+            *self.codes, telegram_id=event_from_user.id, session=session
+        )
@@ -0,0 +1,196 @@
+import asyncio
+import json
+from collections.abc import Mapping
+from copy import copy
+from datetime import date, datetime, timezone
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from src.api.db.database import async_session
+from src.api.db.models import FsmRecord
+from src.api.db.tracing import current_trace
+from src.log import logger
+from src.utils.cache import LRUCache
+
+
+def _json_default(value: object) -> dict[str, str]:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj: dict[str, Any]) -> object:
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def _dumps(data: Mapping[str, Any]) -> str:
+    return json.dumps(data, default=_json_default, ensure_ascii=False)
+
+
+def _loads(raw: str | None) -> dict[str, Any]:
+    if not raw:
+        return {}
+    return json.loads(raw, object_hook=_json_object_hook)
+
+
+class _Record:
+    __slots__ = ("data", "state")
+
+    def __init__(self, state: str | None = None, data: dict[str, Any] | None = None) -> None:
+        self.state = state
+        self.data = data or {}
+
+
+class DBStorage(BaseStorage):
+    """
+    FSM storage в таблице fsm_storage с in-process LRU кэшем перед ней.
+    Чтения обслуживаются из кэша, изменения копятся и сбрасываются в БД одним
+    upsert через `flush_delay` секунд — несколько update_data за шаг диалога
+    превращаются в одну запись.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 10_000,
+        cache_ttl: float | None = None,
+        flush_delay: float = 0.05,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.flush_delay = flush_delay
+        self.retry_delay = retry_delay
+        self._cache: LRUCache[str, _Record] = LRUCache(cache_size, ttl=cache_ttl)
+        # Несохранённые записи; хранятся отдельно, чтобы вытеснение из кэша их не теряло
+        self._dirty: dict[str, _Record] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+
+    async def _load(self, key: StorageKey) -> tuple[str, _Record]:
+        str_key = self.key_builder.build(key)
+        record = self._dirty.get(str_key) or self._cache.get(str_key)
+        if record is None:
+            async with async_session() as session:
+                row = await session.get(FsmRecord, str_key)
+            record = _Record() if row is None else _Record(row.state, _loads(row.data))
+            self._cache.set(str_key, record)
+        return str_key, record
+
+    def _mark_dirty(self, str_key: str, record: _Record) -> None:
+        self._cache.set(str_key, record)
+        self._dirty[str_key] = record
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later(self.flush_delay))
+
+    async def _flush_later(self, delay: float) -> None:
+        # Запись общая для многих апдейтов — не относить её к трассировке запустившего
+        current_trace.set(None)
+        await asyncio.sleep(delay)
+        try:
+            await self.flush()
+        except (SQLAlchemyError, OSError):
+            # flush вернул записи в очередь; без повтора они ждали бы следующего изменения
+            logger.exception(f"FSM storage flush failed, retrying in {self.retry_delay}s")
+            self._flush_task = asyncio.create_task(self._flush_later(self.retry_delay))
+
+    async def flush(self) -> None:
+        """Записать накопленные изменения в БД."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, {}
+
+            now = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+            upserts = [
+                {"key": key, "state": record.state, "data": _dumps(record.data), "updated_at": now}
+                for key, record in dirty.items()
+                if record.state is not None or record.data
+            ]
+            # Пустые записи (state.clear()) удаляются, чтобы таблица не росла
+            deletes = [
+                key for key, record in dirty.items() if record.state is None and not record.data
+            ]
+            try:
+                async with async_session() as session:
+                    if upserts:
+                        stmt = insert(FsmRecord).values(upserts)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=[FsmRecord.key],
+                            set_={
+                                "state": stmt.excluded.state,
+                                "data": stmt.excluded.data,
+                                "updated_at": stmt.excluded.updated_at,
+                            },
+                        )
+                        await session.execute(stmt)
+                    if deletes:
+                        await session.execute(delete(FsmRecord).where(FsmRecord.key.in_(deletes)))
+                    await session.commit()
+            except BaseException:
+                # Вернуть несохранённое (и при отмене), если запись с тех пор не менялась
+                for key, record in dirty.items():
+                    self._dirty.setdefault(key, record)
+                raise
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        str_key, record = await self._load(key)
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(str_key, record)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        _, record = await self._load(key)
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        str_key, record = await self._load(key)
+        record.data = dict(data)
+        self._mark_dirty(str_key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, record = await self._load(key)
+        return copy(record.data)
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+
+    async def reset(self) -> None:
+        """
+        Записать изменения и забыть кэш: следующие чтения пойдут в БД. Нужно, когда
+        чаты переходят к другому процессу и кэшированные записи могут устареть.
+        """
+        await self.flush()
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    @property
+    def pending(self) -> int:
+        """Число изменений, ещё не записанных в БД."""
+        return len(self._dirty)
+
+
+def build_storage() -> BaseStorage:
+    """Создать FSM storage, выбранный в настройках (FSM_STORAGE=memory|db)."""
+    if settings.fsm_storage == "db":
+        return DBStorage(
+            cache_size=settings.fsm_cache_size,
+            cache_ttl=settings.fsm_cache_ttl or None,
+            flush_delay=settings.fsm_flush_delay,
+        )
+    return MemoryStorage()
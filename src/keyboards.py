@@ -0,0 +1,61 @@
+"""
+Статические клавиатуры. Создаются один раз при импорте и переиспользуются хендлерами:
+объекты aiogram неизменяемы, поэтому один экземпляр безопасно отправлять в любой чат.
+"""
+
+from aiogram.types import (
+    ForceReply,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    KeyboardButton,
+    ReplyKeyboardMarkup,
+)
+
+MAIN_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text="📋 Задачи"), KeyboardButton(text="⏲️ Трекер времени")],
+        [KeyboardButton(text="📆 События"), KeyboardButton(text="📄 Документы")],
+        [KeyboardButton(text="⚙️ Настройки")],
+    ],
+    resize_keyboard=True,
+)
+
+TASKS_MENU = ReplyKeyboardMarkup(
+    keyboard=[
+        [
+            KeyboardButton(text="➕ Создать задачу"),
+            KeyboardButton(text="📄 Мои задачи"),
+            KeyboardButton(text="🔎 Все задачи"),
+        ],
+        [KeyboardButton(text="⬅️ Назад")],
+    ],
+    resize_keyboard=True,
+)
+
+TASK_DEADLINE_CHOICE = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [
+            InlineKeyboardButton(text="📅 Указать дату", callback_data="task_deadline_date"),
+            InlineKeyboardButton(text="🛑 Без дедлайна", callback_data="task_deadline_none"),
+        ]
+    ]
+)
+
+TASK_ASSIGN_MANUAL = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="Ввести @username", callback_data="task_assign_manual")],
+    ]
+)
+
+TASK_ASSIGN_DONE = InlineKeyboardMarkup(
+    inline_keyboard=[[InlineKeyboardButton(text="✅ Готово", callback_data="task_assign_done")]]
+)
+
+TASK_CONFIRM = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="✅ Сохранить", callback_data="task_confirm_save")],
+        [InlineKeyboardButton(text="❌ Отменить", callback_data="task_confirm_cancel")],
+    ]
+)
+
+FORCE_REPLY = ForceReply()
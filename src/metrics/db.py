@@ -0,0 +1,47 @@
+from collections.abc import Callable
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.api.db.tracing import install_query_tracing, observe_queries
+
+from .registry import registry
+
+query_duration = registry.histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-запроса", ["statement"]
+)
+query_errors_total = registry.counter(
+    "db_query_errors_total", "SQL-запросы, завершившиеся ошибкой", ["statement"]
+)
+
+
+def _statement_type(statement: str) -> str:
+    # Первое слово запроса: SELECT, INSERT, UPDATE, ...; без параметров и литералов
+    words = statement.lstrip().split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def _observe(statement: str, duration: float | None) -> None:
+    if duration is None:
+        query_errors_total.inc(statement=_statement_type(statement))
+    else:
+        query_duration.observe(duration, statement=_statement_type(statement))
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Замерять время SQL-запросов движка: события курсора общие с трассировкой запросов."""
+    install_query_tracing(engine)
+    observe_queries(_observe)
+
+
+def pool_collector(snapshot: Callable[[], dict[str, float]]) -> Callable[[], None]:
+    """Коллектор, переносящий снимок пула соединений в gauge `db_pool_*`."""
+    gauges = {}
+
+    def collect() -> None:
+        for key, value in snapshot().items():
+            gauge = gauges.get(key)
+            if gauge is None:
+                gauge = gauges[key] = registry.gauge(f"db_pool_{key}", f"Пул соединений: {key}")
+            gauge.set(value)
+
+    return collect
@@ -0,0 +1,80 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from .registry import registry
+
+updates_total = registry.counter(
+    "bot_updates_total", "Обработанные апдейты по типу события", ["event_type"]
+)
+update_errors_total = registry.counter(
+    "bot_update_errors_total", "Апдейты, завершившиеся исключением", ["event_type"]
+)
+update_duration = registry.histogram(
+    "bot_update_duration_seconds",
+    "Время обработки апдейта, включая сессию БД и commit",
+    ["event_type"],
+)
+updates_in_flight = registry.gauge("bot_updates_in_flight", "Апдейты в обработке")
+handler_duration = registry.histogram(
+    "bot_handler_duration_seconds", "Время выполнения хендлера", ["handler"]
+)
+handler_errors_total = registry.counter(
+    "bot_handler_errors_total", "Исключения в хендлерах", ["handler"]
+)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """
+    Outer middleware на `dp.update`: поток апдейтов, ошибки и полное время обработки.
+    Регистрируется первым, чтобы учитывать ожидание слота и commit.
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        self.in_flight += 1
+        updates_in_flight.set(self.in_flight)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            update_errors_total.inc(event_type=event_type)
+            raise
+        finally:
+            update_duration.observe(time.perf_counter() - started, event_type=event_type)
+            updates_total.inc(event_type=event_type)
+            self.in_flight -= 1
+            updates_in_flight.set(self.in_flight)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware на наблюдателях событий: время и ошибки конкретного хендлера.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        name = data["handler"].callback.__name__
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            handler_errors_total.inc(handler=name)
+            raise
+        finally:
+            handler_duration.observe(time.perf_counter() - started, handler=name)
@@ -0,0 +1,57 @@
+from collections.abc import Callable
+
+from aiogram.fsm.storage.base import BaseStorage
+from aiohttp import web
+
+from src.log import logger
+
+from .registry import Registry, registry
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+fsm_records = registry.gauge("fsm_storage_records", "Записи FSM в памяти процесса")
+fsm_pending = registry.gauge("fsm_storage_pending", "Изменения FSM, ещё не записанные в БД")
+
+
+def fsm_collector(storage: BaseStorage) -> Callable[[], None]:
+    """Коллектор размеров FSM storage: DBStorage (кэш и очередь записи) или MemoryStorage."""
+
+    def collect() -> None:
+        records = getattr(storage, "storage", None)
+        fsm_records.set(len(records) if records is not None else len(storage))
+        fsm_pending.set(getattr(storage, "pending", 0))
+
+    return collect
+
+
+def build_metrics_app(metrics: Registry = registry) -> web.Application:
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(body=metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    return app
+
+
+async def start_metrics_server(host: str, port: int, span: int = 1) -> web.AppRunner | None:
+    """
+    Поднять HTTP-сервер с /metrics на первом свободном порту из port..port+span-1:
+    у каждого процесса (воркера gunicorn, шарда) свои метрики на своём порту.
+    Если свободных портов нет, метрики этого процесса не публикуются, бот продолжает работу.
+    """
+    runner = web.AppRunner(build_metrics_app(), access_log=None)
+    await runner.setup()
+    for candidate in range(port, port + max(span, 1)):
+        site = web.TCPSite(runner, host=host, port=candidate)
+        try:
+            await site.start()
+        except OSError as e:
+            error = e
+            # Снять несостоявшийся сайт с runner, иначе он останется в его списке
+            await site.stop()
+            continue
+        logger.info(f"Metrics available at http://{host}:{candidate}/metrics")
+        return runner
+    logger.warning(f"Metrics server not started on {host}:{port}+{span}: {error}")
+    await runner.cleanup()
+    return None
@@ -0,0 +1,25 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.api.db.database import session_scope
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Одна сессия и одна транзакция на апдейт: сессия передаётся хендлерам в `session`,
+    commit выполняется после обработки, rollback — при исключении.
+    Соединение из пула берётся только при первом запросе к БД.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        async with session_scope() as session:
+            data["session"] = session
+            return await handler(event, data)
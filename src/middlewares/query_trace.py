@@ -0,0 +1,40 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from src.api.db.tracing import check_trace, set_handler, trace_queries
+
+
+class QueryTraceMiddleware(BaseMiddleware):
+    """
+    Outer middleware: собирает запросы к БД за апдейт и предупреждает о превышении
+    бюджета запросов и повторах одной формы запроса (N+1).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        label = event.event_type if isinstance(event, Update) else type(event).__name__
+        with trace_queries(label) as trace:
+            try:
+                return await handler(event, data)
+            finally:
+                check_trace(trace)
+
+
+class QueryHandlerMiddleware(BaseMiddleware):
+    """Inner middleware: относит запросы апдейта к выбранному хендлеру."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        set_handler(data["handler"].callback.__name__)
+        return await handler(event, data)
@@ -0,0 +1,28 @@
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from src.objects.users import UserService
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Передаёт хендлерам `user` — запись User отправителя апдейта.
+    Пользователь заводится при первом обращении; в установившемся режиме берётся из кэша
+    без запросов к БД. Регистрируется после DbSessionMiddleware.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        if from_user is not None and not from_user.is_bot:
+            data["user"] = await UserService.resolve_telegram_user(
+                data["session"], from_user.id, from_user.username, from_user.full_name
+            )
+        return await handler(event, data)
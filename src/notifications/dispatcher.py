@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections.abc import Iterable
+from typing import Any, NamedTuple
+
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+
+from config import settings
+from src.api.db.database import async_session
+from src.log import logger
+from src.objects.chat_notifications import ChatNotificationService
+
+from .rate_limit import RateLimiter
+
+
+class Notification(NamedTuple):
+    chat_id: int
+    text: str
+    user_id: int | None = None
+    event_id: int | None = None
+    chat_type: str = "private"
+
+
+class DispatchStats:
+    def __init__(self) -> None:
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.started = time.perf_counter()
+        self.finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Доставлено сообщений в секунду."""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"DispatchStats(sent={self.sent}, failed={self.failed}, retried={self.retried}, "
+            f"elapsed={self.elapsed:.2f}s, throughput={self.throughput:.1f}/s)"
+        )
+
+
+# Лимиты общие для всех рассылок процесса
+default_limiter = RateLimiter(
+    global_rate=settings.notify_global_rate,
+    per_chat_rate=settings.notify_chat_rate,
+)
+
+
+class NotificationDispatcher:
+    """
+    Рассылка уведомлений множеству пользователей.
+    Отправка идёт пулом из `workers` корутин с глобальным и per-chat лимитами;
+    на retry_after рассылка приостанавливается и сообщение повторяется.
+    Доставленные уведомления записываются в chat_notifications пачками после отправки.
+    `bot` — любой объект с корутиной send_message(chat_id, text), например aiogram.Bot.
+    """
+
+    def __init__(
+        self,
+        bot: Any,
+        limiter: RateLimiter | None = None,
+        workers: int | None = None,
+        max_attempts: int | None = None,
+        record: bool = True,
+    ) -> None:
+        self.bot = bot
+        self.limiter = limiter or default_limiter
+        self.workers = workers or settings.notify_workers
+        self.max_attempts = max_attempts or settings.notify_max_attempts
+        self.record = record
+
+    async def deliver(self, notification: Notification, stats: DispatchStats) -> bool:
+        """Отправить одно сообщение с учётом лимитов и повторов."""
+        for _ in range(self.max_attempts):
+            await self.limiter.acquire(notification.chat_id)
+            try:
+                await self.bot.send_message(notification.chat_id, notification.text)
+            except TelegramRetryAfter as e:
+                stats.retried += 1
+                self.limiter.pause(e.retry_after)
+                continue
+            except TelegramAPIError:
+                logger.exception(f"Failed to send notification to {notification.chat_id}")
+                break
+            stats.sent += 1
+            return True
+        stats.failed += 1
+        return False
+
+    async def _worker(
+        self,
+        queue: asyncio.Queue[Notification],
+        delivered: list[Notification],
+        stats: DispatchStats,
+    ) -> None:
+        while True:
+            notification = await queue.get()
+            try:
+                if await self.deliver(notification, stats):
+                    delivered.append(notification)
+            except Exception:
+                # Воркер должен пережить любую ошибку сообщения, иначе очередь не опустеет
+                stats.failed += 1
+                logger.exception(f"Failed to send notification to {notification.chat_id}")
+            finally:
+                queue.task_done()
+
+    async def send_many(self, notifications: Iterable[Notification]) -> DispatchStats:
+        stats = DispatchStats()
+        queue: asyncio.Queue[Notification] = asyncio.Queue()
+        for notification in notifications:
+            queue.put_nowait(notification)
+        if queue.empty():
+            stats.finished = time.perf_counter()
+            return stats
+
+        delivered: list[Notification] = []
+        workers = [
+            asyncio.create_task(self._worker(queue, delivered, stats))
+            for _ in range(min(self.workers, queue.qsize()))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+        stats.finished = time.perf_counter()
+
+        if self.record and delivered:
+            await self._record(delivered)
+        return stats
+
+    @staticmethod
+    async def _record(delivered: list[Notification]) -> None:
+        async with async_session() as session:
+            await ChatNotificationService.create_many(
+                session,
+                (
+                    {
+                        "user_id": n.user_id,
+                        "event_id": n.event_id,
+                        "chat_type": n.chat_type,
+                        "message": n.text,
+                    }
+                    for n in delivered
+                ),
+            )
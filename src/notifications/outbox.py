@@ -0,0 +1,208 @@
+"""
+Доставка сообщений из outbox.
+
+Воркер забирает пачки готовых сообщений (FOR UPDATE SKIP LOCKED), отправляет их пулом
+корутин с общими лимитами Bot API и отмечает результат: отправлено, повтор с
+экспоненциальной задержкой или окончательная ошибка. Несколько процессов с воркером
+делят очередь без координации. Отдельный процесс доставки:
+python -m src.notifications.outbox
+"""
+
+import asyncio
+import contextlib
+import random
+from datetime import datetime, timedelta
+from typing import Any
+
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from src.api.db.database import async_session
+from src.api.db.models import OutboxMessage
+from src.log import logger
+from src.objects.outbox import STATUS_FAILED, STATUS_SENT, OutboxService
+from src.utils.time import utcnow
+
+from .dispatcher import default_limiter
+from .rate_limit import RateLimiter
+
+
+class OutboxWorker:
+    """
+    `bot` — любой объект с корутиной send_message(chat_id, text), например aiogram.Bot.
+    Доставка «хотя бы один раз»: если процесс упадёт между отправкой и отметкой,
+    сообщение уйдёт повторно после окончания аренды. Чтобы аренда не истекла во время
+    отправки, сообщения, до которых очередь дошла в последнюю четверть аренды,
+    не отправляются, а возвращаются в очередь без засчитанной попытки.
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter | None = None,
+        workers: int = 8,
+        batch_size: int = 100,
+        poll_interval: float = 5.0,
+        lease: timedelta = timedelta(minutes=1),
+        max_attempts: int = 8,
+        backoff_base: float = 2.0,
+        backoff_max: float = 600.0,
+    ) -> None:
+        self.limiter = limiter or default_limiter
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._bot: Any = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot: Any) -> None:
+        self._bot = bot
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def wake(self) -> None:
+        """Новые сообщения зафиксированы — не ждать следующего опроса."""
+        self._wakeup.set()
+
+    def backoff(self, attempts: int) -> timedelta:
+        """Задержка перед повтором: base * 2^(attempts-1), не больше max, со случайным разбросом."""
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                claimed = await self.drain_once()
+            except (SQLAlchemyError, OSError):
+                logger.exception("Outbox delivery failed")
+                claimed = 0
+            if claimed >= self.batch_size:
+                continue
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+
+    async def drain_once(self) -> int:
+        """Забрать и доставить одну пачку. Возвращает число взятых сообщений."""
+        now = utcnow()
+        async with async_session() as session:
+            messages = await OutboxService.claim(session, now, self.lease, self.batch_size)
+        if not messages:
+            return 0
+
+        leased_until = now + self.lease
+        # Запас на саму отправку: начатая ближе к концу аренды могла бы её пережить
+        deadline = leased_until - self.lease / 4
+        semaphore = asyncio.Semaphore(self.workers)
+
+        async def send(message: OutboxMessage) -> dict[str, Any]:
+            async with semaphore:
+                return await self._send(message, deadline)
+
+        sent = await asyncio.gather(
+            *(send(message) for message in messages), return_exceptions=True
+        )
+        results = []
+        for message, result in zip(messages, sent, strict=True):
+            if isinstance(result, BaseException):
+                # Ошибка одного сообщения не отменяет отметки остальных
+                logger.error(f"Outbox message {message.id} failed", exc_info=result)
+                results.append(self._retry(message, utcnow(), str(result)))
+            else:
+                results.append(result)
+        async with async_session() as session:
+            await OutboxService.finish(session, leased_until, results)
+        return len(messages)
+
+    async def _send(self, message: OutboxMessage, deadline: datetime) -> dict[str, Any]:
+        """Отправить сообщение и вернуть изменения строки outbox."""
+        await self.limiter.acquire(message.chat_id)
+        now = utcnow()
+        if now >= deadline:
+            # Лимиты задержали пачку до конца аренды — вернуть сообщение в очередь сразу
+            return self._result(message, attempts=message.attempts - 1, next_attempt_at=now)
+        try:
+            await self._bot.send_message(message.chat_id, message.text)
+        except TelegramRetryAfter as e:
+            self.limiter.pause(e.retry_after)
+            # Ограничение Telegram — не ошибка сообщения, попытка не засчитывается
+            return self._result(
+                message,
+                attempts=message.attempts - 1,
+                next_attempt_at=now + timedelta(seconds=e.retry_after),
+                last_error=str(e),
+            )
+        except (TelegramForbiddenError, TelegramBadRequest) as e:
+            # Бот заблокирован или сообщение некорректно — повтор не поможет
+            logger.warning(f"Outbox message {message.id} rejected: {e}")
+            return self._result(message, status=STATUS_FAILED, last_error=str(e))
+        except (TelegramAPIError, OSError, TimeoutError) as e:
+            return self._retry(message, now, str(e))
+        return self._result(message, status=STATUS_SENT, sent_at=now)
+
+    def _retry(self, message: OutboxMessage, now: datetime, error: str) -> dict[str, Any]:
+        """Повтор с задержкой или окончательная ошибка после `max_attempts` попыток."""
+        if message.attempts >= self.max_attempts:
+            logger.error(f"Outbox message {message.id} failed after {message.attempts} tries")
+            return self._result(message, status=STATUS_FAILED, last_error=error)
+        return self._result(
+            message, next_attempt_at=now + self.backoff(message.attempts), last_error=error
+        )
+
+    @staticmethod
+    def _result(message: OutboxMessage, **changes: Any) -> dict[str, Any]:
+        """Строка для `OutboxService.finish`: все поля, чтобы пачка шла одним executemany."""
+        return {
+            "message_id": message.id,
+            "status": message.status,
+            "attempts": message.attempts,
+            "next_attempt_at": message.next_attempt_at,
+            "last_error": message.last_error,
+            "sent_at": message.sent_at,
+            **changes,
+        }
+
+
+outbox_worker = OutboxWorker(
+    workers=settings.outbox_workers,
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval,
+    lease=timedelta(seconds=settings.outbox_lease),
+    max_attempts=settings.outbox_max_attempts,
+    backoff_base=settings.outbox_backoff_base,
+    backoff_max=settings.outbox_backoff_max,
+)
+
+
+async def main() -> None:
+    from src.app import create_bot
+
+    bot = create_bot()
+    outbox_worker.start(bot)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await outbox_worker.stop()
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from src.utils.cache import LRUCache
+
+
+class TokenBucket:
+    """
+    Token bucket с резервированием: токен можно взять «в долг», тогда вызывающий
+    получает время ожидания. Так конкурирующие отправители встают в очередь без циклов опроса.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """Взять токен и вернуть, сколько секунд ждать до его появления."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    async def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """
+    Глобальный лимит Bot API плюс лимит на каждый чат.
+    `pause` останавливает все отправки, когда Telegram вернул retry_after.
+    """
+
+    def __init__(self, global_rate: float, per_chat_rate: float, max_chats: int = 10_000) -> None:
+        self.per_chat_rate = per_chat_rate
+        self._global = TokenBucket(global_rate)
+        self._chats: LRUCache[int, TokenBucket] = LRUCache(max_chats)
+        self._paused_until = 0.0
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, chat_id: int) -> None:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_chat_rate, capacity=1.0)
+            self._chats.set(chat_id, bucket)
+        await bucket.acquire()
+        await self._global.acquire()
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
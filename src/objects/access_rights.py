@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.api.db.models import AccessRight
 
 from .base_service import BaseService
+from .permission_resolver import permission_resolver
 
 
 class AccessRightService(BaseService[AccessRight]):
@@ -13,11 +14,9 @@ class AccessRightService(BaseService[AccessRight]):
     model = AccessRight
 
     @classmethod
-    async def create(cls, session: AsyncSession, user_id: int, permission_id: int) -> AccessRight:
-        access = AccessRight(user_id=user_id, permission_id=permission_id)
-        session.add(access)
-
-        await session.commit()
-        await session.refresh(access)
+    def _changed(cls, obj: AccessRight) -> None:
+        permission_resolver.invalidate_user(obj.user_id)
 
-        return access
+    @classmethod
+    async def create(cls, session: AsyncSession, user_id: int, permission_id: int) -> AccessRight:
+        return await cls._insert(session, user_id=user_id, permission_id=permission_id)
@@ -1,11 +1,70 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from functools import partial
+from itertools import islice
+from typing import Any, Generic, NamedTuple, TypeVar
 
-from sqlalchemy import select
+from sqlalchemy import (
+    ColumnElement,
+    cast,
+    column,
+    delete,
+    insert,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import QueryableAttribute, joinedload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from src.api.db.database import commit
 
 ModelType = TypeVar("ModelType")
 
+# Связь для загрузки: атрибут (Task.assignee) или путь (Event.participants, EventParticipant.user)
+LoadPath = QueryableAttribute | Sequence[QueryableAttribute]
+
+
+class Page(NamedTuple):
+    """
+    Страница keyset-пагинации.
+    `first`/`last` — курсоры первой и последней строки, `has_more` — есть ли строки дальше
+    в направлении чтения.
+    """
+
+    items: Sequence[Any]
+    first: tuple | None
+    last: tuple | None
+    has_more: bool
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _load_options(load: Iterable[LoadPath]) -> list[LoaderOption]:
+    """
+    Опции загрузки связей: many-to-one — joinedload (в том же запросе),
+    коллекции — selectinload (один дополнительный запрос на связь, без размножения строк).
+    Граф объектов загружается фиксированным числом запросов, без ленивых обращений.
+    """
+    options = []
+    for path in load:
+        attrs = (path,) if isinstance(path, QueryableAttribute) else tuple(path)
+        option = None
+        for attr in attrs:
+            if attr.property.uselist:
+                option = selectinload(attr) if option is None else option.selectinload(attr)
+            else:
+                option = joinedload(attr) if option is None else option.joinedload(attr)
+        options.append(option)
+    return options
+
 
 class BaseService(ABC, Generic[ModelType]):
     """
@@ -13,6 +72,8 @@ class BaseService(ABC, Generic[ModelType]):
     """
 
     model: type[ModelType]
+    # Размер пачки для массовых операций по умолчанию
+    batch_size: int = 500
 
     @classmethod
     @abstractmethod
@@ -20,15 +81,148 @@ class BaseService(ABC, Generic[ModelType]):
         pass
 
     @classmethod
-    async def get(cls, session: AsyncSession, obj_id: int) -> ModelType | None:
-        result = await session.execute(select(cls.model).where(cls.model.id == obj_id))
+    async def _insert(cls, session: AsyncSession, **values: object) -> ModelType:
+        """
+        Создать строку одним INSERT ... RETURNING: серверные значения (id, created_at)
+        возвращаются тем же запросом, без повторного SELECT через refresh.
+        """
+        obj = await session.scalar(insert(cls.model).values(**values).returning(cls.model))
+        await cls._commit(session, obj)
+        return obj
+
+    @classmethod
+    async def _commit(cls, session: AsyncSession, *changed: ModelType) -> None:
+        """
+        Зафиксировать изменения и вызвать хук `_changed` для изменённых объектов.
+        В сессии с внешней транзакцией (middleware, `connection`) хуки выполняются
+        после общего commit.
+        """
+        if changed:
+            await cls._before_commit(session, *changed)
+        hooks = [partial(cls._changed, obj) for obj in changed] if cls._has_change_hook() else []
+        await commit(session, *hooks)
+
+    @classmethod
+    async def _before_commit(cls, session: AsyncSession, *changed: ModelType) -> None:
+        """
+        Хук перед фиксацией изменений, в той же транзакции. Подходит для действий,
+        которые должны зафиксироваться вместе с изменением (например, NOTIFY).
+        """
+
+    @classmethod
+    def _changed(cls, obj: ModelType) -> None:
+        """
+        Хук после фиксации создания, изменения или удаления объекта.
+        Переопределяется сервисами, которым нужно обновить кэши в своём процессе.
+        """
+
+    @classmethod
+    def _has_change_hook(cls) -> bool:
+        return (
+            cls._changed.__func__ is not BaseService._changed.__func__
+            or cls._before_commit.__func__ is not BaseService._before_commit.__func__
+        )
+
+    @classmethod
+    async def get(
+        cls, session: AsyncSession, obj_id: int, load: Sequence[LoadPath] = ()
+    ) -> ModelType | None:
+        stmt = select(cls.model).where(cls.model.id == obj_id).options(*_load_options(load))
+        result = await session.execute(stmt)
         return result.scalars().one_or_none()
 
     @classmethod
-    async def list(cls, session: AsyncSession) -> list[ModelType]:
-        result = await session.execute(select(cls.model))
+    async def list(
+        cls,
+        session: AsyncSession,
+        *filters: ColumnElement[bool],
+        order_by: Sequence[ColumnElement] = (),
+        limit: int | None = None,
+        load: Sequence[LoadPath] = (),
+    ) -> list[ModelType]:
+        stmt = (
+            select(cls.model)
+            .where(*filters)
+            .order_by(*order_by)
+            .limit(limit)
+            .options(*_load_options(load))
+        )
+        result = await session.execute(stmt)
         return result.scalars().all()
 
+    @classmethod
+    async def page(
+        cls,
+        session: AsyncSession,
+        *filters: ColumnElement[bool],
+        order_by: Sequence[ColumnElement] = (),
+        after: tuple | None = None,
+        before: tuple | None = None,
+        limit: int = 50,
+        descending: bool = False,
+        load: Sequence[LoadPath] = (),
+    ) -> Page:
+        """
+        Keyset (seek) пагинация: следующая страница после курсора `after`
+        или предыдущая перед курсором `before`.
+        Курсор — значения выражений `order_by` и `id` строки; `id` добавляется
+        в конец сортировки для однозначности. Значения ключей не должны быть NULL.
+        """
+        keys = (*order_by, cls.model.id)
+        backward = before is not None
+        # При чтении назад сортировка и сравнение инвертируются, а строки разворачиваются
+        reverse = descending != backward
+
+        stmt = select(cls.model, *keys).where(*filters).options(*_load_options(load))
+        cursor = before if backward else after
+        if cursor is not None:
+            if reverse:
+                stmt = stmt.where(tuple_(*keys) < tuple_(*cursor))
+            else:
+                stmt = stmt.where(tuple_(*keys) > tuple_(*cursor))
+        stmt = stmt.order_by(*(key.desc() if reverse else key.asc() for key in keys))
+        stmt = stmt.limit(limit + 1)
+
+        result = await session.execute(stmt)
+        rows = result.all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+
+        if not rows:
+            return Page(items=[], first=None, last=None, has_more=False)
+        return Page(
+            items=[row[0] for row in rows],
+            first=tuple(rows[0][1:]),
+            last=tuple(rows[-1][1:]),
+            has_more=has_more,
+        )
+
+    @classmethod
+    async def stream(
+        cls,
+        session: AsyncSession,
+        *filters: ColumnElement[bool],
+        order_by: Sequence[ColumnElement] = (),
+        batch_size: int = 500,
+        load: Sequence[LoadPath] = (),
+    ) -> AsyncIterator[ModelType]:
+        """
+        Потоковое чтение через серверный курсор: в памяти держится не более `batch_size` строк.
+        Коллекции из `load` догружаются selectinload отдельно для каждой пачки.
+        """
+        stmt = (
+            select(cls.model)
+            .where(*filters)
+            .order_by(*order_by)
+            .options(*_load_options(load))
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream_scalars(stmt)
+        async for obj in result:
+            yield obj
+
     @classmethod
     async def update(cls, session: AsyncSession, obj_id: int, **kwargs: object) -> ModelType | None:
         obj = await cls.get(session, obj_id)
@@ -36,7 +230,7 @@ class BaseService(ABC, Generic[ModelType]):
             return None
         for key, value in kwargs.items():
             setattr(obj, key, value)
-        await session.commit()
+        await cls._commit(session, obj)
         await session.refresh(obj)
         return obj
 
@@ -46,5 +240,92 @@ class BaseService(ABC, Generic[ModelType]):
         if not obj:
             return False
         await session.delete(obj)
-        await session.commit()
+        await cls._commit(session, obj)
         return True
+
+    @classmethod
+    async def create_many(
+        cls,
+        session: AsyncSession,
+        rows: Iterable[dict[str, Any]],
+        batch_size: int | None = None,
+    ) -> Sequence[ModelType]:
+        """
+        Массовое создание: многострочный INSERT ... RETURNING и одна транзакция на пачку.
+        """
+        created = []
+        for batch in _batched(rows, batch_size or cls.batch_size):
+            result = await session.scalars(insert(cls.model).returning(cls.model), batch)
+            objs = result.all()
+            await cls._commit(session, *objs)
+            created.extend(objs)
+        return created
+
+    @classmethod
+    async def update_many(
+        cls,
+        session: AsyncSession,
+        rows: Iterable[dict[str, Any]],
+        batch_size: int | None = None,
+    ) -> int:
+        """
+        Массовое обновление по первичному ключу: каждая строка — словарь с `id`
+        и изменяемыми полями. Строки с одинаковым набором полей обновляются одним
+        UPDATE ... FROM (VALUES ...) RETURNING, одна транзакция на пачку.
+        Возвращает число обновлённых строк: id, которых нет в таблице, не учитываются.
+        """
+        columns = sa_inspect(cls.model).columns
+        has_hook = cls._has_change_hook()
+        updated = 0
+        for batch in _batched(rows, batch_size or cls.batch_size):
+            groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+            for row in batch:
+                keys = tuple(sorted(key for key in row if key != "id"))
+                groups.setdefault(keys, []).append(row)
+            objs = []
+            for keys, group in groups.items():
+                if not keys:
+                    continue
+                names = ("id", *keys)
+                data = values(*(column(name, columns[name].type) for name in names), name="data")
+                data = data.data([tuple(row[name] for name in names) for row in group])
+                stmt = (
+                    update(cls.model)
+                    .where(cls.model.id == data.c.id)
+                    # CAST: столбец VALUES из одних NULL Postgres считает текстовым
+                    .values({key: cast(data.c[key], columns[key].type) for key in keys})
+                    .execution_options(synchronize_session=False)
+                )
+                if has_hook:
+                    # Хуки получают строки из RETURNING: объекты identity map перезаписываются
+                    result = await session.scalars(
+                        stmt.returning(cls.model).execution_options(populate_existing=True)
+                    )
+                    found = result.all()
+                    objs.extend(found)
+                else:
+                    found = (await session.scalars(stmt.returning(cls.model.id))).all()
+                updated += len(found)
+            await cls._commit(session, *objs)
+        return updated
+
+    @classmethod
+    async def delete_many(
+        cls,
+        session: AsyncSession,
+        obj_ids: Iterable[int],
+        batch_size: int | None = None,
+    ) -> int:
+        """Массовое удаление по id, одна транзакция на пачку. Возвращает число удалённых строк."""
+        deleted = 0
+        for batch in _batched(obj_ids, batch_size or cls.batch_size):
+            result = await session.scalars(
+                delete(cls.model)
+                .where(cls.model.id.in_(batch))
+                .returning(cls.model)
+                .execution_options(synchronize_session=False)
+            )
+            objs = result.all()
+            await cls._commit(session, *objs)
+            deleted += len(objs)
+        return deleted
@@ -21,15 +21,10 @@ class ChatNotificationService(BaseService[ChatNotification]):
         chat_type: str,
         message: str,
     ) -> ChatNotification:
-        cn = ChatNotification(
+        return await cls._insert(
+            session,
             user_id=user_id,
             event_id=event_id,
             chat_type=chat_type,
             message=message,
         )
-        session.add(cn)
-
-        await session.commit()
-        await session.refresh(cn)
-
-        return cn
@@ -1,10 +1,82 @@
-from datetime import datetime, timezone
+from collections.abc import Sequence
+from html import escape
+from typing import NamedTuple
 
+from sqlalchemy import ColumnElement, and_, exists, func, insert, select, true, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from src.api.db.models import DocumentApproval
+from src.api.db.database import commit
+from src.api.db.models import Document, DocumentApproval
+from src.utils.time import utcnow
 
 from .base_service import BaseService
+from .outbox import OutboxService
+
+# Статусы документа в цепочке согласования
+STATUS_IN_REVIEW = "in_review"
+STATUS_APPROVED = "approved"
+STATUS_REJECTED = "rejected"
+
+# Шаг ждёт решения / шаг отклонён (approve(approved=False) проставляет approved_at)
+PENDING = and_(DocumentApproval.approved.is_not(True), DocumentApproval.approved_at.is_(None))
+REJECTED = and_(DocumentApproval.approved.is_not(True), DocumentApproval.approved_at.is_not(None))
+
+
+class ChainState(NamedTuple):
+    document_id: int
+    status: str
+    total: int
+    approved: int
+    rejected: int
+    current_approval_id: int | None
+    current_approver_id: int | None
+    next_approver_id: int | None
+
+
+def _rejected(document_id: int) -> ColumnElement[bool]:
+    """В цепочке есть отклонённый шаг — она завершена, решений больше не ждёт."""
+    step = aliased(DocumentApproval)
+    return exists().where(
+        step.document_id == document_id,
+        step.approved.is_not(True),
+        step.approved_at.is_not(None),
+    )
+
+
+def _pending_step(document_id: int, column: ColumnElement[int], offset: int) -> ColumnElement[int]:
+    """
+    Колонка шага цепочки, `offset`-го по порядку среди ожидающих решения;
+    NULL, если цепочка отклонена.
+    """
+    return (
+        select(column)
+        .where(DocumentApproval.document_id == document_id, PENDING, ~_rejected(document_id))
+        .order_by(DocumentApproval.order_index, DocumentApproval.id)
+        .offset(offset)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+async def _request_approval(
+    session: AsyncSession, approval_id: int, approver_id: int, title: str | None
+) -> None:
+    """Поставить в outbox запрос согласования шага; повтор для того же шага игнорируется."""
+    await OutboxService.enqueue(
+        session,
+        f"approval:{approval_id}:requested",
+        approver_id,
+        f"📄 Документ «{escape(title or '')}» ждёт вашего согласования",
+    )
+
+
+def _chain_status(total: int, rejected: int, current_approval_id: int | None) -> str:
+    if rejected:
+        return STATUS_REJECTED
+    if total and current_approval_id is None:
+        return STATUS_APPROVED
+    return STATUS_IN_REVIEW
 
 
 class DocumentApprovalService(BaseService[DocumentApproval]):
@@ -23,33 +95,172 @@ class DocumentApprovalService(BaseService[DocumentApproval]):
         order_index: int = 0,
     ) -> DocumentApproval:
         """Создать запись по согласованию документа (назначить согласующего)."""
-        da = cls.model(
+        return await cls._insert(
+            session,
             document_id=document_id,
             approver_id=approver_id,
             order_index=order_index,
             approved=False,
         )
-        session.add(da)
-
-        await session.commit()
-        await session.refresh(da)
 
-        return da
-
-    @staticmethod
+    @classmethod
     async def approve(
+        cls,
         session: AsyncSession,
         approval_id: int,
+        *,
         approved: bool = True,
     ) -> DocumentApproval | None:
-        da = await DocumentApprovalService.get(session, approval_id)
+        """
+        Решение по шагу `approval_id` через `approve_and_advance`: принимается, только если
+        сейчас очередь этого шага. Возвращает обновлённый шаг или None.
+        """
+        da = await cls.get(session, approval_id)
         if not da:
             return None
+        state = await cls.approve_and_advance(
+            session, da.document_id, da.approver_id, approved=approved, approval_id=da.id
+        )
+        return da if state is not None else None
+
+    @classmethod
+    async def create_chain(
+        cls,
+        session: AsyncSession,
+        document_id: int,
+        approver_ids: Sequence[int],
+    ) -> Sequence[DocumentApproval] | None:
+        """
+        Создать всю цепочку согласования одним INSERT ... RETURNING
+        и перевести документ на согласование в той же транзакции.
+        Возвращает None, если согласующих нет, документа нет или цепочка для него
+        уже создана: пустая цепочка оставила бы документ на согласовании навсегда.
+        """
+        if not approver_ids:
+            return None
+        # Блокировка документа не даёт двум параллельным вызовам создать по цепочке
+        title = await session.scalar(
+            select(Document.title).where(Document.id == document_id).with_for_update()
+        )
+        if title is None:
+            return None
+        has_chain = await session.scalar(
+            select(exists().where(DocumentApproval.document_id == document_id))
+        )
+        if has_chain:
+            return None
+
+        result = await session.scalars(
+            insert(DocumentApproval).returning(DocumentApproval),
+            [
+                {
+                    "document_id": document_id,
+                    "approver_id": approver_id,
+                    "order_index": order_index,
+                    "approved": False,
+                }
+                for order_index, approver_id in enumerate(approver_ids)
+            ],
+        )
+        approvals = result.all()
+        await session.execute(
+            update(Document).where(Document.id == document_id).values(status=STATUS_IN_REVIEW)
+        )
+        await _request_approval(session, approvals[0].id, approvals[0].approver_id, title)
+        await commit(session)
+        return approvals
+
+    @staticmethod
+    async def chain_state(session: AsyncSession, document_id: int) -> ChainState | None:
+        """
+        Состояние цепочки одним запросом: текущий шаг, следующий согласующий и итоги.
+        Шаги выбираются по индексу (document_id, order_index).
+        """
+        counts = (
+            select(
+                func.count(DocumentApproval.id).label("total"),
+                func.count(DocumentApproval.id)
+                .filter(DocumentApproval.approved.is_(True))
+                .label("approved"),
+                func.count(DocumentApproval.id).filter(REJECTED).label("rejected"),
+            )
+            .where(DocumentApproval.document_id == document_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                Document.id,
+                Document.status,
+                counts.c.total,
+                counts.c.approved,
+                counts.c.rejected,
+                _pending_step(document_id, DocumentApproval.id, 0),
+                _pending_step(document_id, DocumentApproval.approver_id, 0),
+                _pending_step(document_id, DocumentApproval.approver_id, 1),
+            )
+            .join(counts, true())
+            .where(Document.id == document_id)
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        return ChainState(*row) if row else None
+
+    @classmethod
+    async def approve_and_advance(
+        cls,
+        session: AsyncSession,
+        document_id: int,
+        approver_id: int,
+        *,
+        approved: bool = True,
+        approval_id: int | None = None,
+    ) -> ChainState | None:
+        """
+        Решение текущего согласующего: отметить шаг, передать цепочку дальше и обновить
+        Document.status в одной транзакции. Возвращает None, если сейчас не очередь
+        этого согласующего (или шага `approval_id`) или цепочка уже отклонена.
+        """
+        step = await session.scalar(
+            select(DocumentApproval)
+            .where(DocumentApproval.document_id == document_id, PENDING, ~_rejected(document_id))
+            .order_by(DocumentApproval.order_index, DocumentApproval.id)
+            .limit(1)
+            .with_for_update()
+        )
+        if step is None or step.approver_id != approver_id:
+            return None
+        if approval_id is not None and step.id != approval_id:
+            return None
+
+        step.approved = approved
+        step.approved_at = utcnow()
+        await session.flush()
 
-        da.approved = approved
-        da.approved_at = datetime.now(tz=timezone.utc)
+        state = await cls.chain_state(session, document_id)
+        status = _chain_status(state.total, state.rejected, state.current_approval_id)
+        if status != state.status:
+            await session.execute(
+                update(Document).where(Document.id == document_id).values(status=status)
+            )
+            state = state._replace(status=status)
 
-        await session.commit()
-        await session.refresh(da)
+        # Уведомления уходят через outbox в этой же транзакции
+        title, creator_id = (
+            await session.execute(
+                select(Document.title, Document.created_by).where(Document.id == document_id)
+            )
+        ).one()
+        if status == STATUS_IN_REVIEW:
+            await _request_approval(
+                session, state.current_approval_id, state.current_approver_id, title
+            )
+        elif creator_id is not None:
+            verdict = "согласован ✅" if status == STATUS_APPROVED else "отклонён ❌"
+            await OutboxService.enqueue(
+                session,
+                f"document:{document_id}:{status}",
+                creator_id,
+                f"📄 Документ «{escape(title)}» {verdict}",
+            )
 
-        return da
+        await commit(session)
+        return state
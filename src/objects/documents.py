@@ -21,12 +21,10 @@ class DocumentService(BaseService[Document]):
         file_url: str | None = None,
         created_by: int | None = None,
     ) -> Document:
-        doc = Document(
-            title=title, description=description, file_url=file_url, created_by=created_by
+        return await cls._insert(
+            session,
+            title=title,
+            description=description,
+            file_url=file_url,
+            created_by=created_by,
         )
-        session.add(doc)
-
-        await session.commit()
-        await session.refresh(doc)
-
-        return doc
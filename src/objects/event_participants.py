@@ -1,8 +1,12 @@
+from collections.abc import Iterable
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.db.database import notify
 from src.api.db.models import EventParticipant
 
 from .base_service import BaseService
+from .events import EVENT_CHANGES
 
 
 class EventParticipantService(BaseService[EventParticipant]):
@@ -12,6 +16,11 @@ class EventParticipantService(BaseService[EventParticipant]):
 
     model = EventParticipant
 
+    @classmethod
+    async def _before_commit(cls, session: AsyncSession, *changed: EventParticipant) -> None:
+        # Приглашение N участников — одно сообщение на событие, а не N
+        await notify(session, EVENT_CHANGES, (obj.event_id for obj in changed))
+
     @classmethod
     async def create(
         cls,
@@ -22,16 +31,36 @@ class EventParticipantService(BaseService[EventParticipant]):
         reminder_1h: bool | None = None,
         reminder_1d: bool | None = None,
     ) -> EventParticipant:
-        ep = EventParticipant(
+        return await cls._insert(
+            session,
             event_id=event_id,
             user_id=user_id,
             reminder_15min=reminder_15min if reminder_15min is not None else True,
             reminder_1h=reminder_1h if reminder_1h is not None else False,
             reminder_1d=reminder_1d if reminder_1d is not None else False,
         )
-        session.add(ep)
 
-        await session.commit()
-        await session.refresh(ep)
-
-        return ep
+    @classmethod
+    async def invite(
+        cls,
+        session: AsyncSession,
+        event_id: int,
+        user_ids: Iterable[int],
+        reminder_15min: bool = True,
+        reminder_1h: bool = False,
+        reminder_1d: bool = False,
+    ) -> list[EventParticipant]:
+        """Пригласить на событие сразу несколько пользователей."""
+        return await cls.create_many(
+            session,
+            (
+                {
+                    "event_id": event_id,
+                    "user_id": user_id,
+                    "reminder_15min": reminder_15min,
+                    "reminder_1h": reminder_1h,
+                    "reminder_1d": reminder_1d,
+                }
+                for user_id in user_ids
+            ),
+        )
@@ -22,16 +22,11 @@ class EventTypeService(BaseService[EventType]):
         default_reminder_1h: bool = False,
         default_reminder_1d: bool = False,
     ) -> EventType:
-        et = EventType(
+        return await cls._insert(
+            session,
             name=name,
             description=description,
             default_reminder_15min=default_reminder_15min,
             default_reminder_1h=default_reminder_1h,
             default_reminder_1d=default_reminder_1d,
         )
-        session.add(et)
-
-        await session.commit()
-        await session.refresh(et)
-
-        return et
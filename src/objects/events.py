@@ -2,10 +2,14 @@ from datetime import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.api.db.database import notify
 from src.api.db.models import Event
 
 from .base_service import BaseService
 
+# Канал NOTIFY с id изменённых событий: по нему планировщик напоминаний перечитывает событие
+EVENT_CHANGES = "event_changes"
+
 
 class EventService(BaseService[Event]):
     """
@@ -14,6 +18,10 @@ class EventService(BaseService[Event]):
 
     model = Event
 
+    @classmethod
+    async def _before_commit(cls, session: AsyncSession, *changed: Event) -> None:
+        await notify(session, EVENT_CHANGES, (obj.id for obj in changed))
+
     @classmethod
     async def create(
         cls,
@@ -26,7 +34,8 @@ class EventService(BaseService[Event]):
         location: str | None = None,
         created_by: int | None = None,
     ) -> Event:
-        ev = Event(
+        return await cls._insert(
+            session,
             title=title,
             event_type_id=event_type_id,
             start_time=start_time,
@@ -35,9 +44,3 @@ class EventService(BaseService[Event]):
             location=location,
             created_by=created_by,
         )
-        session.add(ev)
-
-        await session.commit()
-        await session.refresh(ev)
-
-        return ev
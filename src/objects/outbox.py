@@ -0,0 +1,115 @@
+from collections.abc import Iterable, Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import bindparam, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.db.database import commit, on_commit
+from src.api.db.models import OutboxMessage, User
+
+from .base_service import BaseService
+
+STATUS_PENDING = "pending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class OutboxService(BaseService[OutboxMessage]):
+    """
+    Очередь исходящих сообщений в БД (transactional outbox).
+    `enqueue` пишет сообщение в транзакцию вызывающего — оно фиксируется тем же commit,
+    что и изменение данных, и доставляется воркером (src/notifications/outbox.py).
+    """
+
+    model = OutboxMessage
+
+    @classmethod
+    async def create(
+        cls,
+        session: AsyncSession,
+        idempotency_key: str,
+        user_id: int,
+        text: str,
+    ) -> OutboxMessage | None:
+        await cls.enqueue(session, idempotency_key, user_id, text)
+        await commit(session)
+        return await session.scalar(
+            select(OutboxMessage).where(OutboxMessage.idempotency_key == idempotency_key)
+        )
+
+    @staticmethod
+    async def enqueue(session: AsyncSession, idempotency_key: str, user_id: int, text: str) -> None:
+        """
+        Поставить сообщение пользователю в очередь без commit. Повтор с тем же ключом
+        игнорируется; chat_id берётся из users тем же запросом (INSERT ... SELECT).
+        Пользователю без telegram_id писать некуда — строка не вставляется, а транзакция
+        вызывающего не прерывается нарушением NOT NULL.
+        """
+        # Импорт здесь: воркер зависит от сервисов, а не наоборот
+        from src.notifications.outbox import outbox_worker
+
+        recipient = select(
+            literal(idempotency_key), User.id, User.telegram_id, literal(text)
+        ).where(User.id == user_id, User.telegram_id.is_not(None))
+        await session.execute(
+            insert(OutboxMessage)
+            .from_select(
+                ["idempotency_key", "user_id", "chat_id", "text"],
+                recipient,
+            )
+            .on_conflict_do_nothing(index_elements=[OutboxMessage.idempotency_key])
+        )
+        on_commit(session, outbox_worker.wake)
+
+    @staticmethod
+    async def claim(
+        session: AsyncSession, now: datetime, lease: timedelta, limit: int
+    ) -> Sequence[OutboxMessage]:
+        """
+        Взять до `limit` готовых к отправке сообщений. Строки, занятые другими воркерами,
+        пропускаются (FOR UPDATE SKIP LOCKED); взятые арендуются на `lease` —
+        если воркер упадёт, после аренды их подберёт другой.
+        """
+        ready = (
+            select(OutboxMessage.id)
+            .where(OutboxMessage.status == STATUS_PENDING, OutboxMessage.next_attempt_at <= now)
+            .order_by(OutboxMessage.next_attempt_at, OutboxMessage.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        result = await session.scalars(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ready))
+            .values(attempts=OutboxMessage.attempts + 1, next_attempt_at=now + lease)
+            .returning(OutboxMessage)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = result.all()
+        await commit(session)
+        return claimed
+
+    @staticmethod
+    async def finish(
+        session: AsyncSession, leased_until: datetime, results: Iterable[dict[str, Any]]
+    ) -> None:
+        """
+        Записать результаты отправки пачки, взятой `claim` с арендой до `leased_until`.
+        Строка обновляется, только пока аренда её: если другой воркер уже забрал
+        сообщение заново, его next_attempt_at другой и запись пропускается.
+        Все словари `results` должны содержать одинаковые ключи и `message_id`.
+        """
+        table = OutboxMessage.__table__
+        results = list(results)
+        if not results:
+            return
+        await session.execute(
+            update(table).where(
+                table.c.id == bindparam("message_id"),
+                table.c.next_attempt_at == leased_until,
+            ),
+            results,
+        )
+        await commit(session)
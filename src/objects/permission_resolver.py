@@ -0,0 +1,168 @@
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from src.api.db.database import async_session
+from src.api.db.models import AccessRight, Permission, User, role_permissions
+from src.utils.cache import LRUCache
+
+
+class _Codes:
+    """
+    Справочник прав: код -> номер бита и Permission.id -> номер бита. Номера плотные
+    (0..N-1 по порядку id), поэтому маска занимает N бит независимо от значений id.
+    """
+
+    __slots__ = ("bits", "by_code")
+
+    def __init__(self, rows: Iterable[tuple[str, int]]) -> None:
+        self.by_code: dict[str, int] = {}
+        self.bits: dict[int, int] = {}
+        for bit, (code, permission_id) in enumerate(rows):
+            self.by_code[code] = bit
+            self.bits[permission_id] = bit
+
+
+class _Entry:
+    __slots__ = ("bits", "codes", "role_id")
+
+    def __init__(self, bits: int, role_id: int | None, codes: _Codes) -> None:
+        self.bits = bits
+        self.role_id = role_id
+        # Справочник, по которому построена маска: после его смены запись перечитывается
+        self.codes = codes
+
+
+class PermissionResolver:
+    """
+    Эффективные права пользователя: права его роли плюс индивидуальные AccessRight.
+    Набор прав хранится битовой маской (бит — плотный номер права в справочнике) и кэшируется
+    в процессе с TTL/LRU. Сервисы ролей, прав и доступов сбрасывают кэш точечно при изменениях.
+    """
+
+    def __init__(self, cache_size: int = 10_000, ttl: float | None = 300) -> None:
+        self._users: LRUCache[int, _Entry] = LRUCache(cache_size, ttl=ttl)
+        self._telegram: LRUCache[int, int] = LRUCache(cache_size, ttl=ttl)
+        # Роль -> закэшированные пользователи с ней, для точечного сброса при изменении роли
+        self._roles: LRUCache[int, set[int]] = LRUCache(cache_size, ttl=ttl)
+        self._codes: _Codes | None = None
+
+    async def _load_codes(self, session: AsyncSession) -> _Codes:
+        codes = self._codes
+        if codes is None:
+            result = await session.execute(
+                select(Permission.code, Permission.id).order_by(Permission.id)
+            )
+            codes = self._codes = _Codes(result.tuples().all())
+        return codes
+
+    async def _load_user(
+        self,
+        session: AsyncSession,
+        codes: _Codes,
+        user_id: int | None = None,
+        telegram_id: int | None = None,
+    ) -> _Entry | None:
+        """Одним запросом собрать права роли и индивидуальные права пользователя."""
+        cond = User.id == user_id if user_id is not None else User.telegram_id == telegram_id
+        by_role = (
+            select(User.id, User.role_id, User.is_active, role_permissions.c.permission_id)
+            .outerjoin(role_permissions, role_permissions.c.role_id == User.role_id)
+            .where(cond)
+        )
+        individual = (
+            select(User.id, User.role_id, User.is_active, AccessRight.permission_id)
+            .join(AccessRight, AccessRight.user_id == User.id)
+            .where(cond)
+        )
+        rows = (await session.execute(by_role.union_all(individual))).all()
+        if not rows:
+            return None
+
+        uid, role_id, is_active = rows[0][0], rows[0][1], rows[0][2]
+        bits = 0
+        if is_active is not False:
+            for row in rows:
+                # Право, созданное после загрузки справочника, проверить всё равно нельзя
+                bit = codes.bits.get(row[3])
+                if bit is not None:
+                    bits |= 1 << bit
+
+        entry = _Entry(bits, role_id, codes)
+        self._users.set(uid, entry)
+        if role_id is not None:
+            members = self._roles.get(role_id) or set()
+            members.add(uid)
+            # set продлевает TTL: запись роли живёт не меньше записей её пользователей
+            self._roles.set(role_id, members)
+        if telegram_id is not None:
+            self._telegram.set(telegram_id, uid)
+        return entry
+
+    async def has(
+        self,
+        *codes: str,
+        user_id: int | None = None,
+        telegram_id: int | None = None,
+        session: AsyncSession | None = None,
+    ) -> bool:
+        """Есть ли у пользователя все перечисленные права."""
+        if user_id is None and telegram_id is not None:
+            user_id = self._telegram.get(telegram_id)
+        entry = self._users.get(user_id) if user_id is not None else None
+        known = self._codes
+
+        if entry is None or known is None or entry.codes is not known:
+            if session is None:
+                async with async_session() as own_session:
+                    return await self.has(
+                        *codes, user_id=user_id, telegram_id=telegram_id, session=own_session
+                    )
+            # Справочник и маска берутся из локальных переменных: invalidate_codes
+            # во время await не должен ломать начатую проверку
+            known = await self._load_codes(session)
+            if entry is None or entry.codes is not known:
+                entry = await self._load_user(
+                    session, known, user_id=user_id, telegram_id=telegram_id
+                )
+                if entry is None:
+                    return False
+
+        required = 0
+        for code in codes:
+            bit = entry.codes.by_code.get(code)
+            if bit is None:
+                return False
+            required |= 1 << bit
+        return entry.bits & required == required
+
+    async def warm(self, session: AsyncSession) -> None:
+        """Загрузить справочник кодов прав заранее, до первой проверки."""
+        await self._load_codes(session)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._users.pop(user_id)
+
+    def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            self._users.pop(user_id)
+
+    def invalidate_role(self, role_id: int) -> None:
+        self.invalidate_users(self._roles.pop(role_id) or ())
+
+    def invalidate_codes(self) -> None:
+        self._codes = None
+
+    def clear(self) -> None:
+        self._users.clear()
+        self._telegram.clear()
+        self._roles.clear()
+        self._codes = None
+
+
+permission_resolver = PermissionResolver(
+    cache_size=settings.permissions_cache_size,
+    ttl=settings.permissions_cache_ttl or None,
+)
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.api.db.models import Permission
 
 from .base_service import BaseService
+from .permission_resolver import permission_resolver
 
 
 class PermissionService(BaseService[Permission]):
@@ -13,6 +14,10 @@ class PermissionService(BaseService[Permission]):
 
     model = Permission
 
+    @classmethod
+    def _changed(cls, obj: Permission) -> None:
+        permission_resolver.invalidate_codes()
+
     @classmethod
     async def create(
         cls,
@@ -21,10 +26,4 @@ class PermissionService(BaseService[Permission]):
         description: str | None = None,
     ) -> Permission:
         """Создать новое право (permission)."""
-        permission = Permission(code=code, description=description)
-        session.add(permission)
-
-        await session.commit()
-        await session.refresh(permission)
-
-        return permission
+        return await cls._insert(session, code=code, description=description)
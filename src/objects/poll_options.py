@@ -14,10 +14,4 @@ class PollOptionService(BaseService[PollOption]):
 
     @classmethod
     async def create(cls, session: AsyncSession, poll_id: int, option_text: str) -> PollOption:
-        opt = PollOption(poll_id=poll_id, option_text=option_text)
-        session.add(opt)
-
-        await session.commit()
-        await session.refresh(opt)
-
-        return opt
+        return await cls._insert(session, poll_id=poll_id, option_text=option_text)
@@ -1,13 +1,103 @@
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from sqlalchemy import case, delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.db.models import PollResponse
+from src.api.db.database import commit
+from src.api.db.models import PollOption, PollResponse
+from src.utils.time import utcnow
+
+from .base_service import BaseService, _batched
+
+
+async def _apply_votes(session: AsyncSession, deltas: Counter[int | None]) -> None:
+    """Изменить счётчики вариантов на `deltas` (option_id -> число голосов) одним UPDATE."""
+    deltas = Counter({option_id: n for option_id, n in deltas.items() if option_id and n})
+    if not deltas:
+        return
+    await session.execute(
+        update(PollOption)
+        .where(PollOption.id.in_(deltas))
+        .values(votes_count=PollOption.votes_count + case(deltas, value=PollOption.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
 
-from .base_service import BaseService
+
+async def _shift_votes(
+    session: AsyncSession, from_option_id: int | None, to_option_id: int | None
+) -> None:
+    """Перенести один голос между вариантами (любой из id может быть None)."""
+    if from_option_id != to_option_id:
+        await _apply_votes(session, Counter({from_option_id: -1, to_option_id: 1}))
+
+
+async def _vote(session: AsyncSession, votes: dict[tuple[int, int], int]) -> list[PollResponse]:
+    """
+    Записать голоса {(poll_id, user_id): option_id} и обновить счётчики без commit.
+    Новые ответы вставляются INSERT ... ON CONFLICT DO NOTHING, у уже голосовавших
+    голос переносится под блокировкой их ответов; ответ, удалённый параллельно между
+    этими шагами, вставляется на следующем проходе. Голоса за вариант другого опроса
+    пропускаются. Ответы возвращаются в порядке `votes`.
+    """
+    valid = set(
+        (
+            await session.execute(
+                select(PollOption.poll_id, PollOption.id).where(
+                    PollOption.id.in_(sorted(set(votes.values())))
+                )
+            )
+        ).tuples()
+    )
+    pending = {key: option_id for key, option_id in votes.items() if (key[0], option_id) in valid}
+    responses: dict[tuple[int, int], PollResponse] = {}
+    deltas: Counter[int | None] = Counter()
+    while pending:
+        inserted = await session.scalars(
+            insert(PollResponse)
+            .values(
+                [
+                    {"poll_id": poll_id, "user_id": user_id, "option_id": option_id}
+                    for (poll_id, user_id), option_id in pending.items()
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["poll_id", "user_id"])
+            .returning(PollResponse)
+        )
+        for resp in inserted:
+            del pending[resp.poll_id, resp.user_id]
+            responses[resp.poll_id, resp.user_id] = resp
+            deltas[resp.option_id] += 1
+        if not pending:
+            break
+
+        # Пользователи уже голосовали: блокируем их ответы и переносим голоса
+        existing = await session.scalars(
+            select(PollResponse)
+            .where(tuple_(PollResponse.poll_id, PollResponse.user_id).in_(list(pending)))
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        for resp in existing:
+            option_id = pending.pop((resp.poll_id, resp.user_id))
+            if resp.option_id != option_id:
+                deltas[resp.option_id] -= 1
+                deltas[option_id] += 1
+                resp.option_id = option_id
+                resp.responded_at = utcnow()
+            responses[resp.poll_id, resp.user_id] = resp
+    await _apply_votes(session, deltas)
+    return [responses[key] for key in votes if key in responses]
 
 
 class PollResponseService(BaseService[PollResponse]):
     """
     CRUD для ответов на опросы.
+    Голос пользователя в опросе один (уникальность poll_id, user_id); счётчики
+    PollOption.votes_count меняются в той же транзакции, что и ответ — в том числе
+    в унаследованных update/create_many/update_many/delete_many.
     """
 
     model = PollResponse
@@ -19,11 +109,113 @@ class PollResponseService(BaseService[PollResponse]):
         poll_id: int,
         user_id: int,
         option_id: int,
-    ) -> PollResponse:
-        resp = PollResponse(poll_id=poll_id, user_id=user_id, option_id=option_id)
-        session.add(resp)
+    ) -> PollResponse | None:
+        """Проголосовать или изменить голос. None — вариант не из этого опроса."""
+        responses = await _vote(session, {(poll_id, user_id): option_id})
+        if not responses:
+            return None
+        await commit(session)
+        return responses[0]
 
-        await session.commit()
-        await session.refresh(resp)
+    @classmethod
+    async def delete(cls, session: AsyncSession, obj_id: int) -> bool:
+        """Отозвать голос."""
+        row = (
+            await session.execute(
+                delete(PollResponse)
+                .where(PollResponse.id == obj_id)
+                .returning(PollResponse.option_id)
+                .execution_options(synchronize_session=False)
+            )
+        ).one_or_none()
+        if row is None:
+            return False
+        await _shift_votes(session, row.option_id, None)
+        await commit(session)
+        return True
 
+    @classmethod
+    async def update(
+        cls, session: AsyncSession, obj_id: int, **kwargs: object
+    ) -> PollResponse | None:
+        resp = await session.scalar(
+            select(PollResponse).where(PollResponse.id == obj_id).with_for_update()
+        )
+        if not resp:
+            return None
+        old_option_id = resp.option_id
+        for key, value in kwargs.items():
+            setattr(resp, key, value)
+        await _shift_votes(session, old_option_id, resp.option_id)
+        await commit(session)
+        await session.refresh(resp)
         return resp
+
+    @classmethod
+    async def create_many(
+        cls,
+        session: AsyncSession,
+        rows: Iterable[dict[str, Any]],
+        batch_size: int | None = None,
+    ) -> Sequence[PollResponse]:
+        """
+        Массовое голосование с той же обработкой повторов, что и `create`: повторный голос
+        пользователя переносится, а не нарушает uix_poll_response_user. Из повторов
+        одного пользователя в `rows` действует последний.
+        """
+        created = []
+        for batch in _batched(rows, batch_size or cls.batch_size):
+            votes = {(row["poll_id"], row["user_id"]): row["option_id"] for row in batch}
+            resps = await _vote(session, votes)
+            await commit(session)
+            created.extend(resps)
+        return created
+
+    @classmethod
+    async def update_many(
+        cls,
+        session: AsyncSession,
+        rows: Iterable[dict[str, Any]],
+        batch_size: int | None = None,
+    ) -> int:
+        updated = 0
+        for batch in _batched(rows, batch_size or cls.batch_size):
+            moved = {row["id"]: row["option_id"] for row in batch if "option_id" in row}
+            deltas: Counter[int | None] = Counter()
+            if moved:
+                # Прежние варианты под блокировкой: голоса нельзя перенести дважды
+                previous = await session.execute(
+                    select(PollResponse.id, PollResponse.option_id)
+                    .where(PollResponse.id.in_(moved))
+                    .with_for_update()
+                )
+                for resp_id, option_id in previous:
+                    deltas[option_id] -= 1
+                    deltas[moved[resp_id]] += 1
+            await session.execute(update(PollResponse), batch)
+            await _apply_votes(session, deltas)
+            await commit(session)
+            updated += len(batch)
+        return updated
+
+    @classmethod
+    async def delete_many(
+        cls,
+        session: AsyncSession,
+        obj_ids: Iterable[int],
+        batch_size: int | None = None,
+    ) -> int:
+        deleted = 0
+        for batch in _batched(obj_ids, batch_size or cls.batch_size):
+            option_ids = (
+                await session.scalars(
+                    delete(PollResponse)
+                    .where(PollResponse.id.in_(batch))
+                    .returning(PollResponse.option_id)
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            await _apply_votes(session, Counter({o: -n for o, n in Counter(option_ids).items()}))
+            await commit(session)
+            deleted += len(option_ids)
+        return deleted
@@ -1,6 +1,8 @@
+from sqlalchemy import Row, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.db.models import Poll
+from src.api.db.database import commit
+from src.api.db.models import Poll, PollOption, PollResponse
 
 from .base_service import BaseService
 
@@ -19,10 +21,28 @@ class PollService(BaseService[Poll]):
         question: str,
         created_by: int | None = None,
     ) -> Poll:
-        p = Poll(question=question, created_by=created_by)
-        session.add(p)
-
-        await session.commit()
-        await session.refresh(p)
-
-        return p
+        return await cls._insert(session, question=question, created_by=created_by)
+
+    @staticmethod
+    async def results(session: AsyncSession, poll_id: int) -> list[Row]:
+        """Итоги опроса из счётчиков: (id, option_text, votes_count) по каждому варианту."""
+        result = await session.execute(
+            select(PollOption.id, PollOption.option_text, PollOption.votes_count)
+            .where(PollOption.poll_id == poll_id)
+            .order_by(PollOption.id)
+        )
+        return list(result.all())
+
+    @staticmethod
+    async def recount(session: AsyncSession, poll_id: int | None = None) -> None:
+        """Пересчитать счётчики по poll_responses (заполнение и восстановление)."""
+        votes = (
+            select(func.count(PollResponse.id))
+            .where(PollResponse.option_id == PollOption.id)
+            .scalar_subquery()
+        )
+        stmt = update(PollOption).values(votes_count=votes)
+        if poll_id is not None:
+            stmt = stmt.where(PollOption.poll_id == poll_id)
+        await session.execute(stmt.execution_options(synchronize_session=False))
+        await commit(session)
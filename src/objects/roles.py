@@ -1,8 +1,14 @@
+from functools import partial
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.db.models import Role
+from src.api.db.database import commit
+from src.api.db.models import Role, role_permissions
 
 from .base_service import BaseService
+from .permission_resolver import permission_resolver
 
 
 class RoleService(BaseService[Role]):
@@ -13,6 +19,10 @@ class RoleService(BaseService[Role]):
 
     model = Role
 
+    @classmethod
+    def _changed(cls, obj: Role) -> None:
+        permission_resolver.invalidate_role(obj.id)
+
     @classmethod
     async def create_role(
         cls,
@@ -21,10 +31,35 @@ class RoleService(BaseService[Role]):
         description: str | None = None,
     ) -> Role:
         """Создать новую роль."""
-        role = Role(name=name, description=description)
-        session.add(role)
+        return await cls._insert(session, name=name, description=description)
 
-        await session.commit()
-        await session.refresh(role)
+    @classmethod
+    async def grant_permission(
+        cls,
+        session: AsyncSession,
+        role_id: int,
+        permission_id: int,
+    ) -> None:
+        """Добавить право роли."""
+        await session.execute(
+            insert(role_permissions)
+            .values(role_id=role_id, permission_id=permission_id)
+            .on_conflict_do_nothing()
+        )
+        await commit(session, partial(permission_resolver.invalidate_role, role_id))
 
-        return role
+    @classmethod
+    async def revoke_permission(
+        cls,
+        session: AsyncSession,
+        role_id: int,
+        permission_id: int,
+    ) -> None:
+        """Отозвать право у роли."""
+        await session.execute(
+            delete(role_permissions).where(
+                role_permissions.c.role_id == role_id,
+                role_permissions.c.permission_id == permission_id,
+            )
+        )
+        await commit(session, partial(permission_resolver.invalidate_role, role_id))
@@ -1,10 +1,23 @@
+from collections.abc import Sequence
 from datetime import datetime
+from html import escape
 
+from sqlalchemy import func, insert, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.api.db.models import Task
 
-from .base_service import BaseService
+from .base_service import BaseService, LoadPath, Page
+from .outbox import OutboxService
+
+# Ключ сортировки списков задач: задачи без дедлайна идут последними.
+# Совпадает с выражением частичных индексов ix_tasks_open_by_*.
+DEADLINE_KEY = func.coalesce(Task.deadline, literal_column("'infinity'::timestamp"))
+
+
+def _assignment_text(task: Task) -> str:
+    deadline = f"\nДедлайн: {task.deadline:%d.%m.%Y %H:%M}" if task.deadline else ""
+    return f"📌 Вам назначена задача «{escape(task.title)}»{deadline}"
 
 
 class TaskService(BaseService[Task]):
@@ -24,16 +37,106 @@ class TaskService(BaseService[Task]):
         created_by: int | None = None,
         assigned_to: int | None = None,
     ) -> Task:
-        t = Task(
-            title=title,
-            description=description,
-            deadline=deadline,
-            created_by=created_by,
-            assigned_to=assigned_to,
+        """
+        Создать задачу. Уведомление исполнителю ставится в outbox в той же транзакции
+        и отправляется воркером после commit.
+        """
+        task = await session.scalar(
+            insert(Task)
+            .values(
+                title=title,
+                description=description,
+                deadline=deadline,
+                created_by=created_by,
+                assigned_to=assigned_to,
+            )
+            .returning(Task)
         )
-        session.add(t)
+        if assigned_to is not None and assigned_to != created_by:
+            await OutboxService.enqueue(
+                session,
+                f"task:{task.id}:assigned:{assigned_to}",
+                assigned_to,
+                _assignment_text(task),
+            )
+        await cls._commit(session, task)
+        return task
 
-        await session.commit()
-        await session.refresh(t)
+    @classmethod
+    async def open_tasks_page(
+        cls,
+        session: AsyncSession,
+        assigned_to: int | None = None,
+        after: tuple | None = None,
+        before: tuple | None = None,
+        limit: int = 10,
+        load: Sequence[LoadPath] = (),
+    ) -> Page:
+        """
+        Страница открытых задач (всех или одного исполнителя) по дедлайну.
+        Один запрос по частичному индексу независимо от общего числа задач.
+        """
+        filters = [Task.is_completed.is_(False)]
+        if assigned_to is not None:
+            filters.append(Task.assigned_to == assigned_to)
+        return await cls.page(
+            session,
+            *filters,
+            order_by=(DEADLINE_KEY,),
+            after=after,
+            before=before,
+            limit=limit,
+            load=load,
+        )
 
-        return t
+    @classmethod
+    async def due_page(
+        cls,
+        session: AsyncSession,
+        since: datetime,
+        until: datetime,
+        after: tuple | None = None,
+        limit: int = 500,
+    ) -> Page:
+        """
+        Открытые назначенные задачи с дедлайном в (since, until] — диапазон
+        по частичному индексу ix_tasks_open_by_deadline. Исполнитель загружается тем же запросом.
+        """
+        return await cls.page(
+            session,
+            Task.is_completed.is_(False),
+            Task.assigned_to.is_not(None),
+            DEADLINE_KEY > since,
+            DEADLINE_KEY <= until,
+            order_by=(DEADLINE_KEY,),
+            after=after,
+            limit=limit,
+            load=(Task.assignee,),
+        )
+
+    @classmethod
+    async def changed_page(
+        cls,
+        session: AsyncSession,
+        since: datetime,
+        until: datetime,
+        deadline_before: datetime,
+        after: tuple | None = None,
+        limit: int = 500,
+    ) -> Page:
+        """
+        Открытые назначенные задачи, изменённые в (since, until] (UTC), с дедлайном
+        не позже `deadline_before` — по частичному индексу ix_tasks_open_updated_at.
+        """
+        return await cls.page(
+            session,
+            Task.is_completed.is_(False),
+            Task.assigned_to.is_not(None),
+            Task.updated_at > since,
+            Task.updated_at <= until,
+            Task.deadline <= deadline_before,
+            order_by=(Task.updated_at,),
+            after=after,
+            limit=limit,
+            load=(Task.assignee,),
+        )
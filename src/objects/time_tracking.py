@@ -1,12 +1,34 @@
-from datetime import datetime, timezone
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
 
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.db.models import TimeTracking
+from src.api.db.database import commit
+from src.api.db.models import TimeTracking, TimeTrackingRollup
+from src.utils.time import utcnow
 
 from .base_service import BaseService
 
 
+def _split_by_day(started_at: datetime, ended_at: datetime) -> list[tuple[date, timedelta]]:
+    """Разбить интервал на части по локальным суткам."""
+    start = started_at.astimezone()
+    end = ended_at.astimezone()
+    segments = []
+    while start < end:
+        midnight = datetime.combine(start.date() + timedelta(days=1), time.min, start.tzinfo)
+        segment_end = min(end, midnight)
+        segments.append((start.date(), segment_end - start))
+        start = segment_end
+    return segments
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
 class TimeTrackingService(BaseService[TimeTracking]):
     """
     CRUD для трекера времени.
@@ -21,25 +43,108 @@ class TimeTrackingService(BaseService[TimeTracking]):
         user_id: int,
         description: str | None = None,
     ) -> TimeTracking:
-        tt = TimeTracking(
+        return await cls._insert(
+            session,
             user_id=user_id,
             description=description,
-            started_at=datetime.now(tz=timezone.utc),
+            started_at=utcnow(),
         )
-        session.add(tt)
-        await session.commit()
-        await session.refresh(tt)
-        return tt
 
     @classmethod
     async def stop(cls, session: AsyncSession, tt_id: int) -> TimeTracking | None:
-        tt = await TimeTrackingService.get(session, tt_id)
+        """
+        Остановить таймер: заполнить ended_at и duration и в той же транзакции
+        добавить длительность в дневные и недельные итоги пользователя.
+        """
+        tt = await session.get(TimeTracking, tt_id, with_for_update=True)
         if not tt:
             return None
+        if tt.ended_at is not None:
+            return tt
 
-        tt.ended_at = datetime.now(tz=timezone.utc)
+        # Колонки без tzinfo хранят UTC; для разбивки по локальным суткам время
+        # переводится в aware
+        ended_at = utcnow()
+        tt.ended_at = ended_at
+        tt.duration = ended_at - tt.started_at
+        await cls._add_to_rollups(
+            session,
+            tt.user_id,
+            tt.started_at.replace(tzinfo=timezone.utc),
+            ended_at.replace(tzinfo=timezone.utc),
+        )
 
-        await session.commit()
-        await session.refresh(tt)
+        await commit(session)
 
         return tt
+
+    @staticmethod
+    async def _add_to_rollups(
+        session: AsyncSession,
+        user_id: int,
+        started_at: datetime,
+        ended_at: datetime,
+    ) -> None:
+        totals: dict[tuple[str, date], timedelta] = defaultdict(timedelta)
+        for day, duration in _split_by_day(started_at, ended_at):
+            totals["day", day] += duration
+            totals["week", _week_start(day)] += duration
+        if not totals:
+            return
+
+        stmt = insert(TimeTrackingRollup).values(
+            [
+                {
+                    "user_id": user_id,
+                    "period": period,
+                    "period_start": period_start,
+                    "duration": duration,
+                    "entries": 1,
+                }
+                for (period, period_start), duration in totals.items()
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            constraint="uix_time_tracking_rollup",
+            set_={
+                "duration": TimeTrackingRollup.duration + stmt.excluded.duration,
+                "entries": TimeTrackingRollup.entries + stmt.excluded.entries,
+            },
+        )
+        await session.execute(stmt)
+
+    @staticmethod
+    async def total(
+        session: AsyncSession,
+        user_id: int,
+        period: str,
+        since: date,
+        until: date,
+    ) -> timedelta:
+        """Сумма по итогам `period` (day | week) с началом в [since, until)."""
+        result = await session.execute(
+            select(func.sum(TimeTrackingRollup.duration)).where(
+                TimeTrackingRollup.user_id == user_id,
+                TimeTrackingRollup.period == period,
+                TimeTrackingRollup.period_start >= since,
+                TimeTrackingRollup.period_start < until,
+            )
+        )
+        return result.scalar() or timedelta()
+
+    @classmethod
+    async def week_total(
+        cls, session: AsyncSession, user_id: int, day: date | None = None
+    ) -> timedelta:
+        """Учтённое время за неделю, содержащую `day` (по умолчанию — текущую)."""
+        week = _week_start(day or datetime.now(tz=timezone.utc).astimezone().date())
+        return await cls.total(session, user_id, "week", week, week + timedelta(days=1))
+
+    @classmethod
+    async def month_total(
+        cls, session: AsyncSession, user_id: int, day: date | None = None
+    ) -> timedelta:
+        """Учтённое время за месяц, содержащий `day` (по умолчанию — текущий)."""
+        month = (day or datetime.now(tz=timezone.utc).astimezone().date()).replace(day=1)
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        return await cls.total(session, user_id, "day", month, next_month)
@@ -1,8 +1,21 @@
+from functools import partial
+
+from sqlalchemy import exists, func, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
+from src.api.db.database import commit
 from src.api.db.models import User
+from src.utils.cache import LRUCache
 
 from .base_service import BaseService
+from .permission_resolver import permission_resolver
+
+# Пользователи по telegram_id. Объекты отсоединены от сессии — только для чтения.
+telegram_users: LRUCache[int, User] = LRUCache(
+    settings.users_cache_size, ttl=settings.users_cache_ttl or None
+)
 
 
 class UserService(BaseService[User]):
@@ -13,6 +26,11 @@ class UserService(BaseService[User]):
 
     model = User
 
+    @classmethod
+    def _changed(cls, obj: User) -> None:
+        permission_resolver.invalidate_user(obj.id)
+        telegram_users.pop(obj.telegram_id)
+
     @classmethod
     async def create(
         cls,
@@ -24,16 +42,86 @@ class UserService(BaseService[User]):
         is_active: bool = True,
     ) -> User:
         """Создать нового пользователя."""
-        user = User(
+        return await cls._insert(
+            session,
             telegram_id=telegram_id,
             username=username,
             full_name=full_name,
             role_id=role_id,
             is_active=is_active,
         )
-        session.add(user)
 
-        await session.commit()
-        await session.refresh(user)
+    @classmethod
+    async def get_by_telegram_id(cls, session: AsyncSession, telegram_id: int) -> User | None:
+        result = await session.execute(select(User).where(User.telegram_id == telegram_id))
+        return result.scalars().one_or_none()
+
+    @classmethod
+    async def resolve_telegram_user(
+        cls,
+        session: AsyncSession,
+        telegram_id: int,
+        username: str | None,
+        full_name: str | None,
+    ) -> User:
+        """
+        Пользователь по telegram_id. Из кэша, если username и имя не менялись; иначе
+        один запрос: INSERT ... ON CONFLICT DO UPDATE RETURNING в CTE заводит пользователя
+        при первом обращении и обновляет изменившиеся данные, а неизменившаяся строка
+        (её RETURNING не вернёт) не перезаписывается и читается в том же запросе.
+        """
+        user = telegram_users.get(telegram_id)
+        if user is not None and user.username == username and user.full_name == full_name:
+            return user
 
+        table = User.__table__
+        stmt = insert(User).values(telegram_id=telegram_id, username=username, full_name=full_name)
+        upserted = (
+            stmt.on_conflict_do_update(
+                index_elements=[User.telegram_id],
+                set_={"username": stmt.excluded.username, "full_name": stmt.excluded.full_name},
+                where=or_(
+                    User.username.is_distinct_from(stmt.excluded.username),
+                    User.full_name.is_distinct_from(stmt.excluded.full_name),
+                ),
+            )
+            .returning(*table.c)
+            .cte("upserted")
+        )
+        unchanged = select(table).where(
+            table.c.telegram_id == telegram_id, ~exists(upserted.select())
+        )
+        user = await session.scalar(
+            select(User).from_statement(union_all(select(upserted), unchanged)),
+            execution_options={"populate_existing": True},
+        )
+        if user is None:
+            # Строку вставил параллельный запрос после начала нашего: снимок её не видит
+            user = await cls.get_by_telegram_id(session, telegram_id)
+        # В кэш — только после commit, чтобы не запомнить откаченную строку
+        await commit(session, partial(telegram_users.set, telegram_id, user))
         return user
+
+    @classmethod
+    async def search(cls, session: AsyncSession, query: str, limit: int = 20) -> list[User]:
+        """
+        Найти пользователей по началу username или полного имени.
+        Поиск выполняется в БД по индексам lower(...) text_pattern_ops и ограничен `limit`.
+        """
+        query = query.strip().lstrip("@").lower()
+        if not query:
+            return []
+
+        stmt = (
+            select(User)
+            .where(
+                or_(
+                    func.lower(User.username).startswith(query, autoescape=True),
+                    func.lower(User.full_name).startswith(query, autoescape=True),
+                )
+            )
+            .order_by(User.username, User.id)
+            .limit(limit)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
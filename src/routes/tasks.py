@@ -1,19 +1,30 @@
 from datetime import datetime, timezone
+from html import escape
 
 from aiogram import Dispatcher, F, types
 from aiogram.filters import Command, StateFilter
+from aiogram.filters.callback_data import CallbackData
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import (
-    ForceReply,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     InlineQuery,
     InlineQueryResultArticle,
     InputTextMessageContent,
 )
-
-from src.api.db.database import get_session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.api.db.models import Task, User
+from src.keyboards import (
+    FORCE_REPLY,
+    TASK_ASSIGN_DONE,
+    TASK_ASSIGN_MANUAL,
+    TASK_CONFIRM,
+    TASK_DEADLINE_CHOICE,
+    TASKS_MENU,
+)
+from src.objects.base_service import Page
 from src.objects.tasks import TaskService
 from src.objects.users import UserService
 
@@ -26,20 +37,21 @@ class TaskStates(StatesGroup):
     confirm: State = State()
 
 
+# Навигация по спискам задач: курсор keyset-пагинации передаётся в callback data
+class TaskPage(CallbackData, prefix="tasks"):
+    scope: str  # my | all
+    direction: str  # next | prev
+    deadline: str
+    task_id: int
+
+
+TASKS_PAGE_SIZE = 10
+NO_DEADLINE = "inf"
+
+
 async def start_task_menu(message: types.Message) -> None:
     """Показать подменю для задач"""
-    keyboard = types.ReplyKeyboardMarkup(
-        keyboard=[
-            [
-                types.KeyboardButton(text="➕ Создать задачу"),
-                types.KeyboardButton(text="📄 Мои задачи"),
-                types.KeyboardButton(text="🔎 Все задачи"),
-            ],
-            [types.KeyboardButton(text="⬅️ Назад")],
-        ],
-        resize_keyboard=True,
-    )
-    await message.answer("Раздел «Задачи»:", reply_markup=keyboard)
+    await message.answer("Раздел «Задачи»:", reply_markup=TASKS_MENU)
 
 
 async def cmd_task_create(message: types.Message, state: FSMContext) -> None:
@@ -51,15 +63,7 @@ async def cmd_task_create(message: types.Message, state: FSMContext) -> None:
 async def process_title(message: types.Message, state: FSMContext) -> None:
     """Обработка названия задачи и запрос дедлайна"""
     await state.update_data(title=message.text)
-    keyboard: InlineKeyboardMarkup = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(text="📅 Указать дату", callback_data="task_deadline_date"),
-                InlineKeyboardButton(text="🛑 Без дедлайна", callback_data="task_deadline_none"),
-            ]
-        ]
-    )
-    await message.answer("Шаг 2/4. Указать дедлайн?", reply_markup=keyboard)
+    await message.answer("Шаг 2/4. Указать дедлайн?", reply_markup=TASK_DEADLINE_CHOICE)
     await state.set_state(TaskStates.deadline)
 
 
@@ -78,12 +82,7 @@ async def process_deadline(callback: types.CallbackQuery, state: FSMContext) ->
         return
 
     await state.update_data(data)
-    keyboard: InlineKeyboardMarkup = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="Ввести @username", callback_data="task_assign_manual")],
-        ]
-    )
-    await callback.message.answer("Шаг 3/4. Кому назначить?", reply_markup=keyboard)
+    await callback.message.answer("Шаг 3/4. Кому назначить?", reply_markup=TASK_ASSIGN_MANUAL)
     await state.set_state(TaskStates.assign)
 
 
@@ -100,21 +99,18 @@ async def process_deadline_text(message: types.Message, state: FSMContext) -> No
         return
     await state.update_data(deadline=deadline)
 
-    keyboard: InlineKeyboardMarkup = InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="Ввести @username", callback_data="task_assign_manual")]
-        ]
-    )
-    await message.answer("Шаг 3/4. Кому назначить?", reply_markup=keyboard)
+    await message.answer("Шаг 3/4. Кому назначить?", reply_markup=TASK_ASSIGN_MANUAL)
     await state.set_state(TaskStates.assign)
 
 
 async def process_assign_manual(callback: types.CallbackQuery, state: FSMContext) -> None:
     """Запрос ручного ввода username для назначения"""
-    await callback.message.answer("Введите @username исполнителя:", reply_markup=ForceReply())
+    await callback.message.answer("Введите @username исполнителя:", reply_markup=FORCE_REPLY)
 
 
-async def process_assign_text(message: types.Message, state: FSMContext) -> None:
+async def process_assign_text(
+    message: types.Message, state: FSMContext, session: AsyncSession
+) -> None:
     """Обработка текстового ввода username и подготовка подтверждения"""
     match = message.text.strip().split()
     if len(match) != 2 or not match[1].isdigit():
@@ -123,8 +119,7 @@ async def process_assign_text(message: types.Message, state: FSMContext) -> None
 
     user_id = int(match[1])
 
-    async for session in get_session():
-        user = await UserService.get(session, user_id)
+    user = await UserService.get(session, user_id)
     if not user:
         await message.answer("Пользователь не найден.")
         return
@@ -132,19 +127,21 @@ async def process_assign_text(message: types.Message, state: FSMContext) -> None
     data = await state.get_data()
     assigned_to_ids = data.get("assigned_to_ids")
     if user.id != assigned_to_ids:
-        await state.update_data(assigned_to_ids=user.id)
+        # Имя сохраняется вместе с id, чтобы подтверждение не запрашивало пользователя снова
+        await state.update_data(assigned_to_ids=user.id, assigned_to_username=user.username)
         await message.answer(f"✅ Добавлен: @{user.username}")
     else:
         await message.answer(f"@{user.username} уже назначен.")
 
     # Повторим кнопку "Готово"
-    keyboard = InlineKeyboardMarkup(
-        inline_keyboard=[[InlineKeyboardButton(text="✅ Готово", callback_data="task_assign_done")]]
+    await message.answer(
+        "Добавьте ещё пользователя или нажмите «Готово»", reply_markup=TASK_ASSIGN_DONE
     )
-    await message.answer("Добавьте ещё пользователя или нажмите «Готово»", reply_markup=keyboard)
 
 
-async def process_confirm(callback: types.CallbackQuery, state: FSMContext) -> None:
+async def process_confirm(
+    callback: types.CallbackQuery, state: FSMContext, session: AsyncSession, user: User
+) -> None:
     """Обработка подтверждения создания задачи"""
     await callback.answer()
     data = await state.get_data()
@@ -155,22 +152,12 @@ async def process_confirm(callback: types.CallbackQuery, state: FSMContext) -> N
             await callback.message.answer("Вы не выбрали ни одного исполнителя.")
             return
 
-        async for session in get_session():
-            user = await UserService.get(session, assigned_to_ids)
-
         text = (
             f"<b>Название:</b> {data['title']}\n"
             f"<b>Дедлайн:</b> {data.get('deadline') or '—'}\n"
-            f"<b>Исполнители:</b> {user.username}"
-        )
-
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text="✅ Сохранить", callback_data="task_confirm_save")],
-                [InlineKeyboardButton(text="❌ Отменить", callback_data="task_confirm_cancel")],
-            ]
+            f"<b>Исполнители:</b> {data.get('assigned_to_username') or assigned_to_ids}"
         )
-        await callback.message.answer(text, reply_markup=keyboard)
+        await callback.message.answer(text, reply_markup=TASK_CONFIRM)
         await state.set_state(TaskStates.confirm)
         return
 
@@ -180,29 +167,29 @@ async def process_confirm(callback: types.CallbackQuery, state: FSMContext) -> N
         return
 
     if callback.data == "task_confirm_save":
-        async for session in get_session():
-            task = await TaskService.create(
-                session=session,
-                title=data["title"],
-                deadline=data.get("deadline"),
-                assigned_to=data.get("assigned_to_ids"),
-            )
+        task = await TaskService.create(
+            session=session,
+            title=data["title"],
+            deadline=data.get("deadline"),
+            created_by=user.id,
+            assigned_to=data.get("assigned_to_ids"),
+        )
         await callback.message.answer(f"Задача '{task.title}' создана ✅")
         await state.clear()
 
 
-async def user_inline_search(inline_query: InlineQuery, state: FSMContext) -> None:
+async def user_inline_search(
+    inline_query: InlineQuery, state: FSMContext, session: AsyncSession
+) -> None:
     current_state = await state.get_state()
     if current_state != TaskStates.assign.state:
         return  # Не обрабатываем inline-запрос, если не на шаге assign
 
-    query = inline_query.query.lower()
+    query = inline_query.query.strip()
     if not query:
         return
 
-    async for session in get_session():
-        users = await UserService.list(session)
-    matched = [u for u in users if u.username and query in u.username.lower()]
+    matched = await UserService.search(session, query, limit=20)
 
     results = [
         InlineQueryResultArticle(
@@ -211,12 +198,120 @@ async def user_inline_search(inline_query: InlineQuery, state: FSMContext) -> No
             input_message_content=InputTextMessageContent(message_text=f"👤 {user.id}"),
             description=f"{user.full_name or ''}",
         )
-        for user in matched[:20]
+        for user in matched
     ]
 
     await inline_query.answer(results, cache_time=1)
 
 
+def _encode_deadline(value: datetime) -> str:
+    # Без двоеточий: они разделяют поля callback data
+    return NO_DEADLINE if value == datetime.max else value.strftime("%Y%m%d%H%M%S%f")
+
+
+def _decode_deadline(value: str) -> datetime:
+    return datetime.max if value == NO_DEADLINE else datetime.strptime(value, "%Y%m%d%H%M%S%f")
+
+
+def _tasks_page_view(
+    page: Page, scope: str, has_prev: bool, has_next: bool
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    title = "📄 Мои задачи" if scope == "my" else "🔎 Все задачи"
+    if not page.items:
+        return f"<b>{title}</b>\n\nОткрытых задач нет.", None
+
+    lines = [f"<b>{title}</b>", ""]
+    for task in page.items:
+        deadline = f" — до {task.deadline:%d.%m.%Y %H:%M}" if task.deadline else ""
+        assignee = ""
+        if scope == "all" and task.assignee is not None:
+            assignee = f" (@{escape(task.assignee.username or str(task.assignee.telegram_id))})"
+        lines.append(f"• {escape(task.title)}{deadline}{assignee}")
+
+    buttons = []
+    if has_prev:
+        deadline, task_id = page.first
+        buttons.append(
+            InlineKeyboardButton(
+                text="◀️ Назад",
+                callback_data=TaskPage(
+                    scope=scope,
+                    direction="prev",
+                    deadline=_encode_deadline(deadline),
+                    task_id=task_id,
+                ).pack(),
+            )
+        )
+    if has_next:
+        deadline, task_id = page.last
+        buttons.append(
+            InlineKeyboardButton(
+                text="Вперёд ▶️",
+                callback_data=TaskPage(
+                    scope=scope,
+                    direction="next",
+                    deadline=_encode_deadline(deadline),
+                    task_id=task_id,
+                ).pack(),
+            )
+        )
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[buttons]) if buttons else None
+    return "\n".join(lines), keyboard
+
+
+async def _load_tasks_page(
+    session: AsyncSession, user: User, scope: str, cursor: TaskPage | None = None
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    after = before = None
+    if cursor is not None:
+        key = (_decode_deadline(cursor.deadline), cursor.task_id)
+        if cursor.direction == "prev":
+            before = key
+        else:
+            after = key
+
+    if scope == "my":
+        assigned_to, load = user.id, ()
+    else:
+        # Исполнители подгружаются тем же запросом (joinedload), без запроса на задачу
+        assigned_to, load = None, (Task.assignee,)
+    page = await TaskService.open_tasks_page(
+        session,
+        assigned_to=assigned_to,
+        after=after,
+        before=before,
+        limit=TASKS_PAGE_SIZE,
+        load=load,
+    )
+
+    if before is not None:
+        has_prev, has_next = page.has_more, True
+    else:
+        has_prev, has_next = after is not None, page.has_more
+    return _tasks_page_view(page, scope, has_prev, has_next)
+
+
+async def show_my_tasks(message: types.Message, session: AsyncSession, user: User) -> None:
+    """Первая страница открытых задач пользователя"""
+    text, keyboard = await _load_tasks_page(session, user, "my")
+    await message.answer(text, reply_markup=keyboard)
+
+
+async def show_all_tasks(message: types.Message, session: AsyncSession, user: User) -> None:
+    """Первая страница всех открытых задач"""
+    text, keyboard = await _load_tasks_page(session, user, "all")
+    await message.answer(text, reply_markup=keyboard)
+
+
+async def paginate_tasks(
+    callback: types.CallbackQuery, callback_data: TaskPage, session: AsyncSession, user: User
+) -> None:
+    """Переход на следующую/предыдущую страницу списка задач"""
+    await callback.answer()
+    text, keyboard = await _load_tasks_page(session, user, callback_data.scope, callback_data)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+
+
 def register_task_handlers(dp: Dispatcher) -> None:
     """Регистрация хендлеров для работы с задачами"""
     dp.message.register(start_task_menu, F.text == "📋 Задачи")
@@ -224,6 +319,10 @@ def register_task_handlers(dp: Dispatcher) -> None:
     dp.message.register(cmd_task_create, Command(commands=["task_create"]))
     dp.message.register(start_task_menu, F.text == "➕ Создать задачу")
 
+    dp.message.register(show_my_tasks, F.text == "📄 Мои задачи")
+    dp.message.register(show_all_tasks, F.text == "🔎 Все задачи")
+    dp.callback_query.register(paginate_tasks, TaskPage.filter())
+
     dp.message.register(process_title, StateFilter(TaskStates.title))
 
     dp.callback_query.register(process_deadline, StateFilter(TaskStates.deadline))
@@ -0,0 +1,35 @@
+"""
+Планировщики отдельным процессом: python -m src.scheduler
+Нужен, когда бот работает в нескольких воркерах gunicorn — там планировщики не запускаются.
+"""
+
+import asyncio
+
+from config import settings
+from src.app import create_bot, prepare_database
+
+
+async def main() -> None:
+    await prepare_database()
+    bot = create_bot()
+    services = []
+    if settings.reminders_enabled:
+        from .reminders import reminder_scheduler
+
+        services.append(reminder_scheduler)
+    if settings.overdue_sweeper_enabled:
+        from .overdue import overdue_sweeper
+
+        services.append(overdue_sweeper)
+    for service in services:
+        service.start(bot)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for service in services:
+            await service.stop()
+        await bot.session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,188 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
+from functools import partial
+from html import escape
+
+from aiogram import Bot
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from src.api.db.database import async_session, run_as_leader
+from src.api.db.models import JobState, Task, User
+from src.log import logger
+from src.notifications.dispatcher import Notification, NotificationDispatcher
+from src.objects.base_service import Page
+from src.objects.tasks import TaskService
+from src.utils.time import local_now, utcnow
+
+JOB_NAME = "overdue_sweeper"
+# Сколько задач каждого вида перечислять в одном дайджесте
+DIGEST_LIMIT = 20
+
+
+class Digest:
+    """Задачи одного исполнителя, о которых нужно сообщить за проход."""
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+        self.overdue: list[Task] = []
+        self.due_soon: list[Task] = []
+
+    def render(self) -> str:
+        lines = []
+        for title, tasks in (("🔥 Просрочены", self.overdue), ("⏳ Скоро срок", self.due_soon)):
+            if not tasks:
+                continue
+            lines.append(f"<b>{title}:</b>")
+            for task in sorted(tasks, key=lambda t: t.deadline)[:DIGEST_LIMIT]:
+                lines.append(f"• {escape(task.title)} — до {task.deadline:%d.%m.%Y %H:%M}")
+            if len(tasks) > DIGEST_LIMIT:
+                lines.append(f"…и ещё {len(tasks) - DIGEST_LIMIT}")
+        return "\n".join(lines)
+
+
+class OverdueSweeper:
+    """
+    Периодический поиск просроченных и близких к сроку задач с дайджестом исполнителям.
+    Каждый проход смотрит только на переходы с прошлого прохода (отметка в job_state):
+    дедлайны, наступившие или вошедшие в окно `due_soon` с прошлого раза, — диапазон
+    по индексу дедлайнов; и задачи, изменённые с прошлого раза (новые, переназначенные,
+    с перенесённым сроком), — диапазон по индексу updated_at. Оба читаются пачками по
+    `batch_size`, так что проход не зависит от общего числа открытых задач.
+    Одному исполнителю уходит одно сообщение за проход. Из нескольких процессов
+    проходы выполняет один — владелец advisory lock JOB_NAME.
+    updated_at задачи проставляется приложением до commit, поэтому изменения читаются
+    с запаздыванием `change_lag`: изменение, зафиксированное позже отметки, но помеченное
+    временем до неё, попадёт в следующий проход, если транзакция была короче `change_lag`.
+    """
+
+    def __init__(
+        self,
+        interval: timedelta = timedelta(minutes=5),
+        due_soon: timedelta = timedelta(days=1),
+        batch_size: int = 500,
+        change_lag: timedelta = timedelta(minutes=1),
+    ) -> None:
+        self.interval = interval
+        self.due_soon = due_soon
+        self.batch_size = batch_size
+        self.change_lag = change_lag
+        self._task: asyncio.Task | None = None
+        self._bot: Bot | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot: Bot) -> None:
+        self._bot = bot
+        self._task = asyncio.create_task(run_as_leader(JOB_NAME, self._run))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except (SQLAlchemyError, OSError):
+                logger.exception("Overdue sweep failed")
+            await asyncio.sleep(self.interval.total_seconds())
+
+    async def _pages(self, fetch: Callable[..., Awaitable[Page]]) -> AsyncIterator[list[Task]]:
+        after = None
+        while True:
+            async with async_session() as session:
+                page = await fetch(session, after=after, limit=self.batch_size)
+            if page.items:
+                yield page.items
+            if not page.has_more:
+                return
+            after = page.last
+
+    async def sweep(self) -> int:
+        """
+        Один проход. Возвращает число отправленных дайджестов.
+        Выполняется владельцем advisory lock (`start`), поэтому проходы не пересекаются;
+        отметка читается и сдвигается короткими транзакциями — рассылка с лимитами
+        не держит соединение пула в открытой транзакции.
+        """
+        async with async_session() as session:
+            state = await session.get(JobState, JOB_NAME)
+        now, changed_until = local_now(), utcnow() - self.change_lag
+        sent = await self._send_digests(state, now, changed_until)
+
+        # Отметка сдвигается после отправки: при сбое проход повторится с той же точки
+        async with async_session() as session, session.begin():
+            stmt = insert(JobState).values(
+                name=JOB_NAME, ran_until=now, changed_until=changed_until
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[JobState.name],
+                set_={
+                    "ran_until": stmt.excluded.ran_until,
+                    "changed_until": stmt.excluded.changed_until,
+                    "updated_at": utcnow(),
+                },
+            )
+            await session.execute(stmt)
+        return sent
+
+    async def _send_digests(
+        self, state: JobState | None, now: datetime, changed_until: datetime
+    ) -> int:
+        # Первый проход: все уже просроченные задачи, изменения — с этого момента
+        ran_until = state.ran_until if state else datetime.min
+        changed_since = state.changed_until if state else changed_until
+
+        digests: dict[int, Digest] = {}
+        seen: set[int] = set()
+
+        def collect(tasks: list[Task]) -> None:
+            for task in tasks:
+                if task.id in seen or task.assignee is None or task.assignee.is_active is False:
+                    continue
+                seen.add(task.id)
+                digest = digests.get(task.assigned_to)
+                if digest is None:
+                    digest = digests[task.assigned_to] = Digest(task.assignee)
+                (digest.overdue if task.deadline <= now else digest.due_soon).append(task)
+
+        soon_since = ran_until + self.due_soon if state else now
+        sources = (
+            # Стали просроченными: дедлайн в (ran_until, now]
+            partial(TaskService.due_page, since=ran_until, until=now),
+            # Вошли в окно «скоро срок»: дедлайн в (ran_until + due_soon, now + due_soon]
+            partial(TaskService.due_page, since=soon_since, until=now + self.due_soon),
+            # Изменились с прошлого прохода и уже просрочены или скоро срок
+            partial(
+                TaskService.changed_page,
+                since=changed_since,
+                until=changed_until,
+                deadline_before=now + self.due_soon,
+            ),
+        )
+        for fetch in sources:
+            async for tasks in self._pages(fetch):
+                collect(tasks)
+
+        if digests:
+            notifications = [
+                Notification(chat_id=digest.user.telegram_id, text=digest.render(), user_id=user_id)
+                for user_id, digest in digests.items()
+            ]
+            stats = await NotificationDispatcher(self._bot).send_many(notifications)
+            logger.info(f"Overdue digests for {len(seen)} tasks: {stats}")
+        return len(digests)
+
+
+overdue_sweeper = OverdueSweeper(
+    interval=timedelta(seconds=settings.overdue_sweep_interval),
+    due_soon=timedelta(seconds=settings.overdue_due_soon),
+    batch_size=settings.overdue_batch_size,
+    change_lag=timedelta(seconds=settings.overdue_change_lag),
+)
@@ -0,0 +1,243 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+from collections.abc import Coroutine
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+from aiogram import Bot
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from src.api.db.database import async_session, listen, run_as_leader
+from src.api.db.models import Event, EventParticipant, User
+from src.log import logger
+from src.notifications.dispatcher import Notification, NotificationDispatcher
+from src.objects.events import EVENT_CHANGES
+from src.utils.time import local_now
+
+# Флаг участника -> за сколько до начала события напомнить
+REMINDER_OFFSETS = {
+    "reminder_1d": timedelta(days=1),
+    "reminder_1h": timedelta(hours=1),
+    "reminder_15min": timedelta(minutes=15),
+}
+MAX_OFFSET = max(REMINDER_OFFSETS.values())
+MIN_OFFSET = min(REMINDER_OFFSETS.values())
+
+
+class Reminder(NamedTuple):
+    fire_at: datetime
+    event_id: int
+    user_id: int
+    telegram_id: int
+    title: str
+    start_time: datetime
+    offset: timedelta
+    generation: int
+
+
+class ReminderScheduler:
+    """
+    Планировщик напоминаний о событиях.
+    Напоминания загружаются окнами по `window` одним запросом по индексу events.start_time
+    и держатся в min-heap; цикл спит ровно до ближайшего напоминания или конца окна.
+    Сервисы событий и участников шлют NOTIFY EVENT_CHANGES из любого процесса, планировщик
+    перечитывает событие (`refresh_event`) — устаревшие записи в куче отбрасываются
+    по номеру поколения события. Из нескольких процессов напоминания рассылает один —
+    владелец advisory lock "reminders".
+    """
+
+    def __init__(self, window: timedelta = timedelta(hours=1)) -> None:
+        self.window = window
+        self._heap: list[tuple[datetime, int, Reminder]] = []
+        self._seq = itertools.count()
+        self._generations: dict[int, int] = {}
+        # События, которые перечитываются сейчас, и изменённые за время их перечитывания
+        self._reloading: set[int] = set()
+        self._stale: set[int] = set()
+        # События, изменённые во время загрузки окна (None — окно не загружается)
+        self._window_changes: set[int] | None = None
+        self._loaded_until: datetime | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._bot: Bot | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, bot: Bot) -> None:
+        self._bot = bot
+        self._task = asyncio.create_task(run_as_leader("reminders", self._run))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def refresh_event(self, event_id: int) -> None:
+        """
+        Перечитать напоминания события после его изменения или изменения участников.
+        На событие выполняется не больше одного перечитывания: изменения, пришедшие
+        во время него, перечитываются следующим проходом того же таска.
+        """
+        if not self.running or self._loaded_until is None:
+            return
+        if self._window_changes is not None:
+            self._window_changes.add(event_id)
+        if event_id in self._reloading:
+            self._stale.add(event_id)
+            return
+        self._reloading.add(event_id)
+        self._spawn(self._reload_event(event_id))
+
+    def _on_event_changed(self, payload: str) -> None:
+        self.refresh_event(int(payload))
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reload_event(self, event_id: int) -> None:
+        try:
+            while True:
+                self._stale.discard(event_id)
+                await self._load(local_now(), self._loaded_until, event_id=event_id)
+                if event_id not in self._stale:
+                    break
+        except (SQLAlchemyError, OSError):
+            logger.exception(f"Failed to reload reminders of event {event_id}")
+        finally:
+            self._reloading.discard(event_id)
+        self._wakeup.set()
+
+    async def _load(self, since: datetime, until: datetime, event_id: int | None = None) -> None:
+        """
+        Загрузить напоминания со временем срабатывания в (since, until]. Перечитывание
+        события начинает новое поколение до запроса: записи прежних загрузок отбрасываются.
+        """
+        stmt = (
+            select(
+                EventParticipant.event_id,
+                EventParticipant.user_id,
+                EventParticipant.reminder_15min,
+                EventParticipant.reminder_1h,
+                EventParticipant.reminder_1d,
+                Event.title,
+                Event.start_time,
+                User.telegram_id,
+            )
+            .join(Event, Event.id == EventParticipant.event_id)
+            .join(User, User.id == EventParticipant.user_id)
+            .where(
+                Event.start_time > since + MIN_OFFSET,
+                Event.start_time <= until + MAX_OFFSET,
+                User.is_active.is_not(False),
+            )
+        )
+        if event_id is not None:
+            stmt = stmt.where(Event.id == event_id)
+            self._generations[event_id] = self._generations.get(event_id, 0) + 1
+
+        async with async_session() as session:
+            rows = (await session.execute(stmt)).all()
+
+        for row in rows:
+            generation = self._generations.get(row.event_id, 0)
+            for flag, offset in REMINDER_OFFSETS.items():
+                fire_at = row.start_time - offset
+                if not getattr(row, flag) or not since < fire_at <= until:
+                    continue
+                reminder = Reminder(
+                    fire_at=fire_at,
+                    event_id=row.event_id,
+                    user_id=row.user_id,
+                    telegram_id=row.telegram_id,
+                    title=row.title,
+                    start_time=row.start_time,
+                    offset=offset,
+                    generation=generation,
+                )
+                heapq.heappush(self._heap, (fire_at, next(self._seq), reminder))
+
+    def _pop_due(self, now: datetime) -> list[Reminder]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, _, reminder = heapq.heappop(self._heap)
+            if reminder.generation == self._generations.get(reminder.event_id, 0):
+                due.append(reminder)
+        return due
+
+    async def _run(self) -> None:
+        async with listen(EVENT_CHANGES, self._on_event_changed):
+            await self._schedule()
+
+    async def _schedule(self) -> None:
+        # После смены владельца очередь строится заново с текущего момента
+        self._heap.clear()
+        self._loaded_until = local_now()
+        while True:
+            self._wakeup.clear()
+            now = local_now()
+            if now >= self._loaded_until:
+                await self._load_window(now + self.window)
+
+            due = self._pop_due(now)
+            if due:
+                # Отправка с лимитами может занять время — таймер не должен её ждать
+                self._spawn(self._send(due))
+
+            next_at = self._loaded_until
+            if self._heap:
+                next_at = min(next_at, self._heap[0][0])
+            timeout = max((next_at - local_now()).total_seconds(), 0)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+
+    async def _load_window(self, until: datetime) -> None:
+        """
+        Загрузить следующее окно. События, изменённые во время загрузки, могли попасть
+        в окно в прежнем виде — после неё они перечитываются.
+        """
+        self._window_changes = set()
+        try:
+            await self._load(self._loaded_until, until)
+            self._loaded_until = until
+        finally:
+            changed, self._window_changes = self._window_changes, None
+        for event_id in changed:
+            self.refresh_event(event_id)
+
+    async def _send(self, reminders: list[Reminder]) -> None:
+        try:
+            await self._dispatch(reminders)
+        except (SQLAlchemyError, OSError):
+            # Отправленные сообщения не повторяются: не удалась только запись в chat_notifications
+            logger.exception("Failed to record event reminders")
+
+    async def _dispatch(self, reminders: list[Reminder]) -> None:
+        notifications = [
+            Notification(
+                chat_id=reminder.telegram_id,
+                text=(
+                    f"⏰ Напоминание: «{reminder.title}» начнётся "
+                    f"{reminder.start_time:%d.%m.%Y %H:%M}"
+                ),
+                user_id=reminder.user_id,
+                event_id=reminder.event_id,
+            )
+            for reminder in reminders
+        ]
+        stats = await NotificationDispatcher(self._bot).send_many(notifications)
+        logger.info(f"Event reminders: {stats}")
+
+
+reminder_scheduler = ReminderScheduler(window=timedelta(seconds=settings.reminders_window))
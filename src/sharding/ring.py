@@ -0,0 +1,43 @@
+from bisect import bisect, insort
+from collections.abc import Iterable
+from hashlib import blake2b
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """
+    Консистентное хеширование: каждый узел занимает `vnodes` точек на кольце, ключ
+    принадлежит ближайшей точке по часовой стрелке. При добавлении узла к нему
+    переходит примерно 1/N ключей, остальные остаются на своих узлах.
+    """
+
+    def __init__(self, nodes: Iterable[int] = (), vnodes: int = 64) -> None:
+        self.vnodes = vnodes
+        self._points: list[int] = []
+        self._owners: dict[int, int] = {}
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> set[int]:
+        return set(self._owners.values())
+
+    def add(self, node: int) -> None:
+        for replica in range(self.vnodes):
+            point = _hash(f"{node}:{replica}")
+            if point not in self._owners:
+                self._owners[point] = node
+                insort(self._points, point)
+
+    def remove(self, node: int) -> None:
+        self._points = [point for point in self._points if self._owners[point] != node]
+        self._owners = {point: owner for point, owner in self._owners.items() if owner != node}
+
+    def node_for(self, key: int) -> int:
+        if not self._points:
+            raise LookupError("Hash ring is empty")
+        index = bisect(self._points, _hash(str(key))) % len(self._points)
+        return self._owners[self._points[index]]
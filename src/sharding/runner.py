@@ -0,0 +1,243 @@
+"""
+Обработка апдейтов в нескольких процессах с шардированием по чатам.
+
+Процесс-маршрутизатор читает апдейты из источника (polling, webhook или готовый список)
+и раскладывает их по воркерам консистентным хешем chat id: все апдейты чата
+обрабатывает один воркер, в порядке поступления, а его FSM-кэш остаётся локальным.
+Воркер — отдельный процесс со своим Bot, Dispatcher и пулом соединений.
+"""
+
+import asyncio
+import contextlib
+import multiprocessing as mp
+import signal
+from collections.abc import AsyncIterable, Callable
+from importlib import import_module
+from multiprocessing.queues import Queue
+from typing import TYPE_CHECKING, Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from config import settings
+from src.log import logger
+
+from .ring import HashRing
+from .sources import chat_key
+
+if TYPE_CHECKING:
+    from multiprocessing.process import BaseProcess
+
+UPDATE = "update"
+DRAIN = "drain"
+STOP = "stop"
+DEFAULT_BOT_FACTORY = "src.app:create_bot"
+
+
+def _resolve(path: str) -> Callable[[], Bot]:
+    module, _, name = path.partition(":")
+    return getattr(import_module(module), name)
+
+
+class _Worker:
+    """Апдейты одного шарда: чаты обрабатываются параллельно, апдейты чата — по очереди."""
+
+    def __init__(self, index: int, bot: Bot, dp: Dispatcher) -> None:
+        self.index = index
+        self.bot = bot
+        self.dp = dp
+        self.processed = 0
+        self._tails: dict[int, asyncio.Task] = {}
+
+    def submit(self, data: dict[str, Any]) -> None:
+        key = chat_key(data)
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._process(previous, data))
+        self._tails[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+
+    def _forget(self, key: int, task: asyncio.Task) -> None:
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        if not task.cancelled():
+            # Ошибка апдейта уже записана в лог в _process
+            task.exception()
+
+    async def _process(self, previous: asyncio.Task | None, data: dict[str, Any]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        update = Update.model_validate(data, context={"bot": self.bot})
+        try:
+            await self.dp.feed_update(self.bot, update)
+        except Exception:
+            # Ошибка апдейта не останавливает шард: следующий апдейт чата ждёт только завершения
+            logger.exception(f"Shard {self.index}: update {update.update_id} failed")
+            raise
+        finally:
+            self.processed += 1
+
+    async def drain(self) -> None:
+        """Дождаться начатых апдейтов и сбросить FSM-кэш перед перераспределением чатов."""
+        if self._tails:
+            await asyncio.wait(list(self._tails.values()))
+        reset = getattr(self.dp.storage, "reset", None)
+        if reset is not None:
+            await reset()
+
+
+def _configure_shard(index: int) -> None:
+    """
+    Планировщики — только в первом воркере; outbox делится через SKIP LOCKED.
+    Метрики у каждого шарда свои, на порту METRICS_PORT + номер шарда.
+    """
+    if index:
+        settings.reminders_enabled = False
+        settings.overdue_sweeper_enabled = False
+        if settings.metrics_port:
+            settings.metrics_port += index
+
+
+async def _worker_loop(index: int, inbox: Queue, acks: Queue, bot_factory: str) -> None:
+    from src.app import create_dispatcher
+
+    _configure_shard(index)
+    bot = _resolve(bot_factory)()
+    dp = create_dispatcher()
+    worker = _Worker(index, bot, dp)
+    workflow = {"dispatcher": dp, "bots": [bot], "bot": bot}
+    await dp.emit_startup(**workflow)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            kind, payload = await loop.run_in_executor(None, inbox.get)
+            if kind == UPDATE:
+                worker.submit(payload)
+            elif kind == DRAIN:
+                await worker.drain()
+                acks.put(index)
+            elif kind == STOP:
+                await worker.drain()
+                break
+    finally:
+        await dp.emit_shutdown(**workflow)
+        await bot.session.close()
+        logger.info(f"Shard {index} stopped after {worker.processed} updates")
+
+
+def worker_main(index: int, inbox: Queue, acks: Queue, bot_factory: str) -> None:
+    """Точка входа процесса-воркера."""
+    asyncio.run(_worker_loop(index, inbox, acks, bot_factory))
+
+
+class ShardedRunner:
+    """
+    Маршрутизатор апдейтов по процессам-воркерам.
+    `add_worker` перераспределяет чаты без потери порядка: приём приостанавливается,
+    воркеры дорабатывают начатые апдейты и сбрасывают FSM в БД, затем кольцо
+    обновляется. Для сохранения состояния диалогов при перераспределении нужен
+    FSM_STORAGE=db — память процесса не переезжает вместе с чатом.
+    """
+
+    def __init__(self, workers: int, bot_factory: str = DEFAULT_BOT_FACTORY) -> None:
+        self.initial_workers = workers
+        self.bot_factory = bot_factory
+        self.ring = HashRing()
+        self.routed = 0
+        self._context = mp.get_context("spawn")
+        self._acks: Queue = self._context.Queue()
+        self._inboxes: dict[int, Queue] = {}
+        self._processes: dict[int, BaseProcess] = {}
+        self._lock = asyncio.Lock()
+
+    def _spawn(self, index: int) -> None:
+        inbox = self._context.Queue()
+        process = self._context.Process(
+            target=worker_main,
+            args=(index, inbox, self._acks, self.bot_factory),
+            name=f"shard-{index}",
+        )
+        process.start()
+        self._inboxes[index] = inbox
+        self._processes[index] = process
+
+    def start(self) -> None:
+        for index in range(self.initial_workers):
+            self._spawn(index)
+            self.ring.add(index)
+        logger.info(f"Started {self.initial_workers} shard workers")
+
+    async def add_worker(self) -> int:
+        """Добавить воркер и передать ему его долю чатов."""
+        async with self._lock:
+            index = max(self._processes, default=-1) + 1
+            self._spawn(index)
+            if settings.fsm_storage != "db":
+                logger.warning("FSM state of rebalanced chats is lost with in-memory storage")
+            existing = list(self.ring.nodes)
+            for node in existing:
+                self._inboxes[node].put((DRAIN, None))
+            loop = asyncio.get_running_loop()
+            for _ in existing:
+                await loop.run_in_executor(None, self._acks.get)
+            self.ring.add(index)
+        logger.info(f"Shard {index} added, {len(self.ring.nodes)} workers")
+        return index
+
+    async def route(self, update: dict[str, Any]) -> None:
+        async with self._lock:
+            self._inboxes[self.ring.node_for(chat_key(update))].put((UPDATE, update))
+            self.routed += 1
+
+    async def run(self, source: AsyncIterable[dict[str, Any]]) -> None:
+        """Разложить апдейты источника по воркерам; по окончании источника — остановить их."""
+        if not self._processes:
+            self.start()
+        try:
+            async for update in source:
+                await self.route(update)
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        for inbox in self._inboxes.values():
+            inbox.put((STOP, None))
+        loop = asyncio.get_running_loop()
+        for process in self._processes.values():
+            await loop.run_in_executor(None, process.join)
+        self._processes.clear()
+        self._inboxes.clear()
+
+
+async def run_sharded(bot: Bot, dp: Dispatcher, workers: int) -> None:
+    """
+    Замена `dp.start_polling`/webhook для нескольких процессов. `bot` и `dp` этого
+    процесса нужны только для приёма апдейтов; SIGUSR1 добавляет воркер.
+    """
+    from .sources import polling_source, webhook_source
+
+    runner = ShardedRunner(workers)
+    runner.start()
+
+    rebalances: set[asyncio.Task] = set()
+
+    def add_worker() -> None:
+        task = asyncio.create_task(runner.add_worker())
+        rebalances.add(task)
+        task.add_done_callback(rebalances.discard)
+
+    # Сигналы недоступны на Windows
+    with contextlib.suppress(NotImplementedError, AttributeError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, add_worker)
+
+    if settings.run_mode == "webhook":
+        from src.webhook import set_webhook
+
+        await set_webhook(bot, dp)
+        source = webhook_source()
+    else:
+        await bot.delete_webhook()
+        source = polling_source(bot, allowed_updates=dp.resolve_used_update_types())
+    try:
+        await runner.run(source)
+    finally:
+        await bot.session.close()
@@ -0,0 +1,111 @@
+"""
+Источники апдейтов для шардированного запуска: асинхронные итераторы JSON-апдейтов
+(словарей в формате Bot API), которые читает процесс-маршрутизатор.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Iterable
+from typing import Any
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiohttp import web
+
+from config import settings
+from src.log import logger
+
+# Поля апдейта, в которых событие несёт чат (прямо или через message)
+_CHAT_EVENTS = (
+    "message",
+    "edited_message",
+    "channel_post",
+    "edited_channel_post",
+    "business_message",
+    "edited_business_message",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+    "message_reaction",
+    "message_reaction_count",
+    "chat_boost",
+    "removed_chat_boost",
+)
+
+
+def chat_key(update: dict[str, Any]) -> int:
+    """
+    Ключ шардирования апдейта. Чат события, а без чата — пользователь: так же aiogram
+    выбирает ключ FSM, поэтому состояние диалога и порядок апдейтов чата остаются
+    в одном воркере. Inline-запросы пользователя попадают туда же, где его личный чат.
+    """
+    for field in _CHAT_EVENTS:
+        event = update.get(field)
+        if event and "chat" in event:
+            return event["chat"]["id"]
+    for event in update.values():
+        if not isinstance(event, dict):
+            continue
+        message = event.get("message")
+        if isinstance(message, dict) and "chat" in message:
+            return message["chat"]["id"]
+        user = event.get("from") or event.get("user")
+        if user:
+            return user["id"]
+    return update["update_id"]
+
+
+async def iterable_source(updates: Iterable[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    """Готовые апдейты (тесты, бенчмарки, воспроизведение записанных апдейтов)."""
+    for update in updates:
+        yield update
+        await asyncio.sleep(0)
+
+
+async def polling_source(
+    bot: Bot, allowed_updates: list[str] | None = None, timeout: int = 30
+) -> AsyncIterator[dict[str, Any]]:
+    """Long polling getUpdates в процессе-маршрутизаторе."""
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=timeout, allowed_updates=allowed_updates
+            )
+        except (TelegramAPIError, OSError, TimeoutError):
+            # Сетевые ошибки и ответы Bot API; TelegramNetworkError — подкласс TelegramAPIError
+            logger.exception("Failed to fetch updates")
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            yield update.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+async def webhook_source(
+    host: str = settings.webhook_host,
+    port: int = settings.webhook_port,
+    path: str = settings.webhook_path,
+    secret: str = settings.webhook_secret,
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Приём апдейтов на webhook в процессе-маршрутизаторе. Telegram получает ответ сразу
+    после постановки апдейта в очередь; setWebhook выполняется как в обычном режиме.
+    """
+    queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+
+    async def handle(request: web.Request) -> web.Response:
+        if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+            return web.Response(status=401)
+        await queue.put(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        await runner.cleanup()
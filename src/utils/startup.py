@@ -0,0 +1,37 @@
+import time
+
+from src.log import logger
+
+
+class StartupTimer:
+    """
+    Замер этапов запуска: `mark(name)` фиксирует время с предыдущей отметки,
+    `report()` пишет в лог разбивку и общее время. Отсчёт идёт от `start(started)` —
+    точка входа передаёт время, снятое до тяжёлых импортов; без него — от импорта модуля.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.steps: list[tuple[str, float]] = []
+
+    def start(self, started: float) -> None:
+        """Начать отсчёт с `started` (time.perf_counter() в начале точки входа)."""
+        self.started = self._last = started
+        self.steps.clear()
+
+    def mark(self, name: str) -> None:
+        now = time.perf_counter()
+        self.steps.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def report(self) -> None:
+        steps = ", ".join(f"{name} {elapsed:.3f}s" for name, elapsed in self.steps)
+        logger.info(f"Startup: {steps}; total {self.total:.3f}s")
+
+
+startup_timer = StartupTimer()
@@ -0,0 +1,14 @@
+from datetime import datetime, timezone
+
+
+def local_now() -> datetime:
+    """
+    Текущее локальное время без tzinfo — в таком виде хранятся дедлайны задач
+    и время событий, которые вводят пользователи.
+    """
+    return datetime.now(tz=timezone.utc).astimezone().replace(tzinfo=None)
+
+
+def utcnow() -> datetime:
+    """Текущее время UTC без tzinfo — как служебные отметки времени в моделях."""
+    return datetime.now(tz=timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,68 @@
+import time
+
+# Отсчёт запуска воркера gunicorn — до импорта приложения
+STARTED = time.perf_counter()
+
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import settings
+from src.log import logger
+from src.utils.startup import startup_timer
+
+from .app import create_bot, create_dispatcher, prepare_database
+
+
+async def set_webhook(bot: Bot, dispatcher: Dispatcher) -> None:
+    """Зарегистрировать webhook в Telegram, если задан внешний URL."""
+    if not settings.webhook_base_url:
+        return
+    url = settings.webhook_base_url.rstrip("/") + settings.webhook_path
+    await bot.set_webhook(
+        url=url,
+        secret_token=settings.webhook_secret or None,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logger.info(f"Webhook set to {url}")
+
+
+def build_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """aiohttp-приложение, принимающее апдейты на WEBHOOK_PATH."""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.webhook_secret or None,
+    ).register(app, path=settings.webhook_path)
+    dp.startup.register(set_webhook)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Запустить webhook-сервер в текущем процессе."""
+    runner = web.AppRunner(build_app(bot, dp))
+    await runner.setup()
+    site = web.TCPSite(runner, host=settings.webhook_host, port=settings.webhook_port)
+    await site.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def create_app() -> web.Application:
+    """
+    Фабрика приложения для gunicorn, по одному экземпляру на воркер:
+    gunicorn "src.webhook:create_app" --worker-class aiohttp.GunicornWebWorker --workers 4
+    """
+    startup_timer.start(STARTED)
+    startup_timer.mark("imports")
+    if not settings.web_workers_schedulers:
+        settings.reminders_enabled = False
+        settings.overdue_sweeper_enabled = False
+    await prepare_database()
+    return build_app(create_bot(), create_dispatcher())
@@ -0,0 +1,43 @@
+import asyncio
+import os
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+import pytest
+from sqlalchemy.exc import SQLAlchemyError
+
+# config читает настройки при импорте; тесты всегда работают с TEST_DB_URL
+os.environ.setdefault("DB_URL", "postgresql+asyncpg://postgres@localhost/my_crm")
+os.environ.setdefault("TEST_DB_URL", "postgresql+asyncpg://postgres@localhost/my_crm_test")
+os.environ.setdefault("TELEGRAM_TOKEN", "42:TEST")
+os.environ.setdefault("LOG_LEVEL", "warning")
+os.environ["IS_TEST"] = "true"
+
+T = TypeVar("T")
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Выполнить корутину в новом цикле событий. Пул закрывается в том же цикле:
+    соединения asyncpg нельзя переносить между циклами.
+    """
+    from src.api.db.database import engine
+
+    async def main() -> T:
+        try:
+            return await coro
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="session")
+def database() -> None:
+    """Тестовая БД со схемой последней версии; без доступной БД тест пропускается."""
+    from src.api.db.migrations import migrate
+
+    try:
+        run(migrate())
+    except (OSError, SQLAlchemyError, TimeoutError) as e:
+        pytest.skip(f"test database is unavailable: {e}")
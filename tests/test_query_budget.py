@@ -0,0 +1,110 @@
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import pytest
+from aiogram import Bot
+from aiogram.types import Update
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.replay import FakeSession, Updates
+from src.api.db.database import session_scope
+from src.api.db.models import Task, User
+from src.api.db.tracing import query_budget
+from src.app import create_dispatcher
+from src.objects.tasks import TaskService
+from src.objects.users import UserService, telegram_users
+from src.utils.time import local_now
+
+from .conftest import run
+
+TELEGRAM_ID = 8_000_000_001
+TASKS = 25
+
+
+def record(*shapes: str, **budget: int) -> None:
+    """Записать запросы `shapes` в блоке query_budget(**budget)."""
+    with query_budget(**budget) as trace:
+        for shape in shapes:
+            trace.record(shape, 0.001)
+
+
+def test_budget_counts_only_selected_handler() -> None:
+    with query_budget(1, handler="show_my_tasks") as trace:
+        trace.record("SELECT users", 0.001)
+        trace.record("SELECT tasks", 0.001, handler="show_my_tasks")
+
+
+def test_budget_exceeded() -> None:
+    with pytest.raises(AssertionError, match="ran 3 queries, budget 2"):
+        record("SELECT a", "SELECT b", "SELECT c", max_queries=2)
+
+
+def test_repeated_shape_is_reported() -> None:
+    with pytest.raises(AssertionError, match="N\\+1"):
+        record(*["SELECT tasks WHERE id = $1"] * 3, max_queries=100, max_repeats=3)
+
+
+@asynccontextmanager
+async def user_with_tasks() -> AsyncIterator[User]:
+    """Пользователь с открытыми задачами больше чем на страницу; удаляется после теста."""
+    async with session_scope() as session:
+        # Те же данные, что в апдейтах Updates: middleware найдёт пользователя в кэше
+        user = await UserService.resolve_telegram_user(
+            session, TELEGRAM_ID, f"bench_{TELEGRAM_ID}", f"Bench {TELEGRAM_ID}"
+        )
+        deadline = local_now() + timedelta(days=1)
+        session.add_all(
+            Task(
+                title=f"Задача {n}",
+                deadline=deadline + timedelta(hours=n),
+                created_by=user.id,
+                assigned_to=user.id,
+                is_completed=False,
+            )
+            for n in range(TASKS)
+        )
+    try:
+        yield user
+    finally:
+        async with session_scope() as session:
+            await session.execute(delete(Task).where(Task.created_by == user.id))
+            await session.execute(delete(User).where(User.id == user.id))
+        telegram_users.pop(TELEGRAM_ID)
+
+
+@pytest.mark.usefixtures("database")
+@pytest.mark.parametrize(
+    ("text", "handler"), [("📄 Мои задачи", "show_my_tasks"), ("🔎 Все задачи", "show_all_tasks")]
+)
+def test_task_lists_use_one_query(text: str, handler: str) -> None:
+    async def scenario() -> None:
+        bot = Bot(token="42:TEST", session=FakeSession())
+        dp = create_dispatcher()
+        async with user_with_tasks():
+            payload = Updates(TELEGRAM_ID).message(text)
+            update = Update.model_validate(payload, context={"bot": bot})
+            # Страница и исполнители задач — одним запросом, сколько бы задач ни было
+            with query_budget(1, handler=handler, max_repeats=2):
+                await dp.feed_update(bot, update)
+        await dp.storage.close()
+
+    run(scenario())
+
+
+async def get_one_by_one(session: AsyncSession, tasks: Sequence[Task]) -> None:
+    with query_budget(100, max_repeats=5):
+        for task in tasks:
+            await TaskService.get(session, task.id)
+
+
+@pytest.mark.usefixtures("database")
+def test_n_plus_one_trips_max_repeats() -> None:
+    async def scenario() -> None:
+        async with user_with_tasks() as user, session_scope() as session:
+            page = await TaskService.open_tasks_page(session, assigned_to=user.id)
+            with pytest.raises(AssertionError, match="N\\+1"):
+                await get_one_by_one(session, page.items)
+
+    run(scenario())
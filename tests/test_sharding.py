@@ -0,0 +1,88 @@
+import pytest
+
+from config import settings
+from src.sharding.ring import HashRing
+from src.sharding.runner import _configure_shard
+from src.sharding.sources import chat_key
+
+CHAT_IDS = [*range(-100, 100), 10**12, -(10**12) - 17]
+
+
+def message(update_id: int, chat_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": "/start",
+        },
+    }
+
+
+def callback(update_id: int, chat_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "1",
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "message": message(update_id, chat_id)["message"],
+        },
+    }
+
+
+def test_chat_key_is_chat_of_event() -> None:
+    assert chat_key(message(1, -42)) == -42
+    assert chat_key(callback(2, -42, 7)) == -42
+    assert chat_key({"update_id": 3, "inline_query": {"id": "1", "from": {"id": 7}}}) == 7
+
+
+def test_chat_maps_to_same_shard() -> None:
+    ring = HashRing(range(4))
+    shards = {chat_id: ring.node_for(chat_id) for chat_id in CHAT_IDS}
+
+    # Повторные апдейты того же чата и новое кольцо из тех же узлов — тот же шард
+    for update_id, chat_id in enumerate(CHAT_IDS * 3):
+        assert ring.node_for(chat_key(message(update_id, chat_id))) == shards[chat_id]
+        assert ring.node_for(chat_key(callback(update_id, chat_id, 1))) == shards[chat_id]
+    assert {chat_id: HashRing(range(4)).node_for(chat_id) for chat_id in CHAT_IDS} == shards
+    assert set(shards.values()) == {0, 1, 2, 3}
+
+
+def test_added_shard_takes_chats_only_from_others() -> None:
+    ring = HashRing(range(4))
+    before = {chat_id: ring.node_for(chat_id) for chat_id in CHAT_IDS}
+    ring.add(4)
+    moved = {chat_id for chat_id in CHAT_IDS if ring.node_for(chat_id) != before[chat_id]}
+
+    assert moved
+    assert all(ring.node_for(chat_id) == 4 for chat_id in moved)
+
+
+@pytest.fixture
+def shard_settings(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "reminders_enabled", True)
+    monkeypatch.setattr(settings, "overdue_sweeper_enabled", True)
+    monkeypatch.setattr(settings, "metrics_port", 9100)
+
+
+@pytest.mark.usefixtures("shard_settings")
+def test_first_shard_keeps_schedulers() -> None:
+    _configure_shard(0)
+
+    assert settings.reminders_enabled
+    assert settings.overdue_sweeper_enabled
+    assert settings.metrics_port == 9100
+
+
+@pytest.mark.usefixtures("shard_settings")
+@pytest.mark.parametrize("index", [1, 2, 5])
+def test_other_shards_disable_schedulers(index: int) -> None:
+    _configure_shard(index)
+
+    assert not settings.reminders_enabled
+    assert not settings.overdue_sweeper_enabled
+    # Метрики остаются, на своём порту у каждого шарда
+    assert settings.metrics_port == 9100 + index